@@ -0,0 +1,204 @@
+import numpy as np
+from simulation import ALGORITHMS, DISTRIBUTION_NAMES, make_balancer, save_results
+from sweep import publish_requests
+from multiprocessing import shared_memory
+from typing import Dict, List
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+def load_fairness(loads: np.ndarray) -> Dict:
+    """Std, Jain's index and max/mean imbalance of one load vector"""
+    mean_load = loads.mean()
+    squares = np.dot(loads, loads)
+    return {
+        'std_load': float(loads.std()),
+        'balance_score': float(loads.sum() ** 2 / (len(loads) * squares)) if squares > 0 else 1.0,
+        'imbalance': float(loads.max() / mean_load) if mean_load > 0 else 1.0
+    }
+
+def tier_worker(worker: int, num_workers: int, algorithm: str, num_servers: int, requests_name: str, num_requests: int,
+                state_name: str, sync_interval: int, window: int, barrier, results):
+    """One balancer of the tier: routes every num_workers-th request
+
+    Row `worker` of the shared state holds the load this balancer has routed
+    to each server. Every sync_interval requests it publishes its row, reads
+    the sum over all rows as the backend load, and routes the next requests
+    against that view plus its own decisions; other balancers' decisions
+    stay invisible until the next sync. Each row has a single writer, so no
+    lock is taken; reading a row mid-update only adds staleness.
+
+    Windowed fairness is Jain's index of the load the whole tier routed
+    between syncs at least `window` of this worker's requests apart, so it
+    compares across sync intervals; herding onto one server lowers it.
+    """
+    requests = published = requests_block = state_block = None
+    try:
+        requests_block = shared_memory.SharedMemory(name=requests_name)
+        state_block = shared_memory.SharedMemory(name=state_name)
+        requests = np.ndarray((num_requests,), dtype=np.float64, buffer=requests_block.buf)[worker::num_workers]
+        published = np.ndarray((num_workers, num_servers), dtype=np.float64, buffer=state_block.buf)
+        # Seeded per worker, so randomized balancers do not mirror each other
+        kwargs = {'seed': worker} if algorithm in ('Power of Two Choices', 'Consistent Hashing') else {}
+        balancer = make_balancer(algorithm, num_servers, history='off', **kwargs)
+        routed = np.zeros(num_servers)
+        previous = np.zeros(num_servers)
+        view_errors = []
+        window_fairness = []
+        syncs_per_window = -(-window // sync_interval)
+        
+        barrier.wait()
+        start = time.time()
+        for sync, offset in enumerate(range(0, len(requests), sync_interval)):
+            published[worker] = routed
+            backend = published.sum(axis=0)
+            if sync:
+                # How far the view routed on drifted from the backend
+                view_errors.append(float(np.abs(balancer.server_loads - backend).sum() / backend.sum()))
+            if sync and sync % syncs_per_window == 0:
+                window_fairness.append(load_fairness(backend - previous)['balance_score'])
+                previous = backend
+            balancer.set_server_loads(backend)
+            chunk = requests[offset:offset + sync_interval]
+            indices = balancer.assign_batch(chunk)
+            routed += np.bincount(indices, weights=chunk, minlength=num_servers)
+        published[worker] = routed
+        end = time.time()
+        results.put({'worker': worker, 'requests': len(requests), 'start': start, 'end': end, 'syncs': len(view_errors) + 1,
+                     'view_error': float(np.mean(view_errors)) if view_errors else 0.0,
+                     'window_fairness': float(np.mean(window_fairness)) if window_fairness else 1.0})
+    except Exception as e:
+        # Release the other balancers from the barrier and report, instead of leaving the tier waiting
+        barrier.abort()
+        results.put({'worker': worker, 'error': traceback.format_exc(),
+                     'aborted': isinstance(e, threading.BrokenBarrierError)})
+    finally:
+        requests = published = None
+        for block in (requests_block, state_block):
+            if block is not None:
+                block.close()
+
+def collect_results(processes: List, results, poll_interval: float = 1.0) -> List[Dict]:
+    """One result per worker process, sorted by worker; raises RuntimeError if any worker failed or died"""
+    collected = []
+    while len(collected) < len(processes):
+        try:
+            collected.append(results.get(timeout=poll_interval))
+        except queue.Empty:
+            dead = [process.pid for process in processes if process.exitcode not in (None, 0)]
+            if dead:
+                raise RuntimeError(f"Balancer processes {dead} exited without reporting")
+    # Workers released from an aborted barrier also fail; report the one that caused it
+    errors = sorted((result for result in collected if 'error' in result), key=lambda result: result['aborted'])
+    if errors:
+        raise RuntimeError(f"Balancer {errors[0]['worker']} failed:\n{errors[0]['error']}")
+    return sorted(collected, key=lambda result: result['worker'])
+
+def run_tier(algorithm: str, num_servers: int, requests_name: str, num_requests: int, num_workers: int,
+             sync_interval: int, window: int = 1024) -> Dict:
+    """Route one request stream through num_workers balancer processes sharing backend state
+
+    Returns fairness of the final backend loads, mean windowed fairness and
+    view error over all syncs, and the tier's aggregate throughput. Results
+    with more than one worker depend on process scheduling.
+    """
+    if sync_interval < 1:
+        raise ValueError("Sync interval must be at least 1 request")
+    context = multiprocessing.get_context()
+    state_block = shared_memory.SharedMemory(create=True, size=num_workers * num_servers * 8)
+    try:
+        published = np.ndarray((num_workers, num_servers), dtype=np.float64, buffer=state_block.buf)
+        published[:] = 0.0
+        barrier = context.Barrier(num_workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=tier_worker, args=(worker, num_workers, algorithm, num_servers, requests_name,
+                                                      num_requests, state_block.name, sync_interval, window, barrier, results))
+            for worker in range(num_workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            workers = collect_results(processes, results)
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+        server_loads = published.sum(axis=0)
+        del published
+    finally:
+        state_block.close()
+        state_block.unlink()
+    
+    elapsed = max(result['end'] for result in workers) - min(result['start'] for result in workers)
+    record = {'algorithm': algorithm, 'workers': num_workers, 'sync_interval': sync_interval, 'num_servers': num_servers}
+    record.update(load_fairness(server_loads))
+    record.update({
+        'window_fairness': float(np.mean([result['window_fairness'] for result in workers])),
+        'view_error': float(np.mean([result['view_error'] for result in workers])),
+        'requests_per_second': num_requests / elapsed if elapsed > 0 else 0.0,
+        'execution_time': elapsed,
+        'server_loads': server_loads.tolist()
+    })
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a tier of balancer processes sharing backend load state')
+    parser.add_argument('--algorithms', nargs='+', default=['Round Robin', 'Least Connection', 'Power of Two Choices'],
+                        choices=ALGORITHMS)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Balancer processes in the tier')
+    parser.add_argument('--sync-intervals', type=int, nargs='+', default=[1, 64, 1024],
+                        help='Requests each balancer routes between state syncs')
+    parser.add_argument('--window', type=int, default=1024,
+                        help="Requests per balancer in each windowed fairness measurement")
+    parser.add_argument('--servers', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=120000)
+    parser.add_argument('--distribution', default='lognormal', choices=list(DISTRIBUTION_NAMES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Also save all records as results/<output>.json')
+    args = parser.parse_args()
+    if min(args.sync_intervals) < 1 or min(args.workers) < 1 or args.window < 1:
+        parser.error("--workers, --sync-intervals and --window must be positive")
+    
+    dist_name = DISTRIBUTION_NAMES[args.distribution]
+    # Same request stream as simulation.py run 0 of this distribution with this seed
+    blocks = publish_requests(args.seed, 1, args.requests, [dist_name])
+    block = blocks[(0, dist_name)]
+    print(f"🚀 {args.requests} {args.distribution} requests through tiers of {args.workers} balancers on {os.cpu_count()} cores")
+    print(f"\n{'algorithm':<22} {'workers':>7} {'sync':>6} {'jain':>8} {'max/mean':>9} {'window jain':>12} "
+          f"{'view error':>11} {'req/s':>10} {'speedup':>8}")
+    print("-" * 103)
+    sys.stdout.flush()
+    
+    records = []
+    try:
+        for algorithm in args.algorithms:
+            for sync_interval in args.sync_intervals:
+                baseline = None
+                for num_workers in sorted(args.workers):
+                    record = run_tier(algorithm, args.servers, block.name, args.requests, num_workers, sync_interval,
+                                      args.window)
+                    records.append(record)
+                    baseline = baseline or record['requests_per_second']
+                    print(f"{algorithm:<22} {num_workers:>7} {sync_interval:>6} {record['balance_score']:>8.5f} "
+                          f"{record['imbalance']:>9.4f} {record['window_fairness']:>12.4f} {record['view_error']:>11.2e} "
+                          f"{record['requests_per_second']:>10.0f} {record['requests_per_second'] / baseline:>7.2f}x")
+                    sys.stdout.flush()
+    finally:
+        block.close()
+        block.unlink()
+    
+    if args.output:
+        save_results(records, args.output)
+        print(f"\n✅ Records saved to results/{args.output}.json")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+from load_balancer import LeastConnectionLoadBalancer
+import argparse
+import time
+import sys
+
+def time_policy(index: str, num_servers: int, requests: np.ndarray) -> tuple:
+    """Time scalar assign_request calls and return (ns per request, assignments)"""
+    balancer = LeastConnectionLoadBalancer(num_servers, index=index)
+    assignments = np.empty(len(requests), dtype=np.intp)
+    start = time.perf_counter_ns()
+    for i, request in enumerate(requests):
+        assignments[i] = balancer.assign_request(request)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / len(requests), assignments
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare argmin scan and tournament tree least-connection selection across pool sizes')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[3, 10, 100, 1000, 10000, 100000])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(args.seed)
+    requests = rng.lognormal(0.0, 0.5, args.requests)
+    
+    print(f"{'servers':>10} {'scan ns/req':>14} {'tree ns/req':>14} {'speedup':>9}")
+    print("-" * 50)
+    for num_servers in args.pool_sizes:
+        scan_ns, scan_assignments = time_policy('scan', num_servers, requests)
+        tree_ns, tree_assignments = time_policy('tree', num_servers, requests)
+        if not np.array_equal(scan_assignments, tree_assignments):
+            print(f"Assignments differ for {num_servers} servers", file=sys.stderr)
+            sys.exit(1)
+        print(f"{num_servers:>10} {scan_ns:>14.0f} {tree_ns:>14.0f} {scan_ns / tree_ns:>8.2f}x")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import numpy as np
+from load_balancer import WeightedRoundRobinLoadBalancer
+import argparse
+import time
+import sys
+
+def burstiness(cycle: np.ndarray, weights: np.ndarray) -> tuple:
+    """Longest run of consecutive requests to one server, and the largest
+    gap (in requests) between any server's count and its ideal share over
+    any prefix of the cycle"""
+    changes = np.flatnonzero(np.diff(cycle)) + 1
+    runs = np.diff(np.concatenate(([0], changes, [len(cycle)])))
+    if len(runs) > 1 and cycle[0] == cycle[-1]:
+        # The cycle repeats, so the last run continues into the first
+        runs = np.append(runs[1:-1], runs[0] + runs[-1])
+    max_run = int(runs.max())
+
+    shares = weights / weights.sum()
+    counts = np.zeros(len(weights))
+    max_lag = 0.0
+    for step, server_idx in enumerate(cycle, start=1):
+        counts[server_idx] += 1
+        max_lag = max(max_lag, float(np.abs(counts - step * shares).max()))
+    return max_run, max_lag
+
+def time_schedule(schedule: str, weights: list, requests: np.ndarray) -> tuple:
+    """Time setup, scalar assign_request and assign_batch; return ns figures and the balancer"""
+    start = time.perf_counter_ns()
+    balancer = WeightedRoundRobinLoadBalancer(len(weights), weights=weights, schedule=schedule, history='off')
+    setup_ns = time.perf_counter_ns() - start
+
+    assign = balancer.assign_request
+    request_list = requests.tolist()
+    start = time.perf_counter_ns()
+    for request in request_list:
+        assign(request)
+    scalar_ns = (time.perf_counter_ns() - start) / len(request_list)
+    scalar_loads = balancer.server_loads.copy()
+
+    balancer = WeightedRoundRobinLoadBalancer(len(weights), weights=weights, schedule=schedule, history='off')
+    start = time.perf_counter_ns()
+    balancer.assign_batch(requests)
+    batch_ns = (time.perf_counter_ns() - start) / len(requests)
+    if not np.allclose(scalar_loads, balancer.server_loads):
+        print(f"Scalar and batch loads differ for the {schedule} schedule", file=sys.stderr)
+        sys.exit(1)
+    return setup_ns, scalar_ns, batch_ns, balancer
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare burst and smooth weighted round robin schedules')
+    parser.add_argument('--weights', type=float, nargs='+', default=[3, 1, 2])
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[3, 30, 300],
+                        help='Pool sizes; the weight pattern is repeated to fill each pool')
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    requests = rng.lognormal(0.0, 0.5, args.requests)
+
+    print(f"{'servers':>8} {'schedule':>9} {'max run':>8} {'max lag':>8} {'setup ms':>9} {'scalar ns/req':>14} {'batch ns/req':>13}")
+    print("-" * 76)
+    for num_servers in args.pool_sizes:
+        weights = np.resize(args.weights, num_servers).tolist()
+        for schedule in WeightedRoundRobinLoadBalancer.SCHEDULES:
+            setup_ns, scalar_ns, batch_ns, balancer = time_schedule(schedule, weights, requests)
+            max_run, max_lag = burstiness(balancer.cycle, np.bincount(balancer.cycle, minlength=num_servers))
+            print(f"{num_servers:>8} {schedule:>9} {max_run:>8} {max_lag:>8.2f} {setup_ns / 1e6:>9.2f} {scalar_ns:>14.0f} {batch_ns:>13.1f}")
+            sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import numpy as np
+from result_store import ResultStore, cell_key, code_version
+from typing import TYPE_CHECKING, Dict, List
+from datetime import datetime
+import argparse
+import os
+import re
+import sys
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Latency percentiles kept from ab and wrk outputs; NaN where a tool does not report one
+PERCENTILES = (50, 75, 90, 95, 99)
+
+# HAProxy config names (configs/haproxy_<policy>[_variant].cfg) to simulation algorithms
+CONFIG_ALGORITHMS = {
+    'rr': 'Round Robin',
+    'lc': 'Least Connection',
+    'wrr': 'Weighted Round Robin'
+}
+
+# Files written by scripts/run_ab_and_save.sh and run_wrk_and_save.sh; the
+# config part is missing from files written before the scripts recorded it
+FILE_NAMES = {
+    'ab': re.compile(r'^ab_(?:(?P<config>.+)_)?(?P<requests>\d+)n_(?P<concurrency>\d+)c_(?P<timestamp>\d{8}_\d{6})\.txt$'),
+    'wrk': re.compile(r'^wrk_(?:(?P<config>.+)_)?(?P<concurrency>\d+)c_(?P<duration>[^_]+)_(?P<timestamp>\d{8}_\d{6})\.txt$')
+}
+
+TIME_UNITS_MS = {'us': 1e-3, 'ms': 1.0, 's': 1e3, 'm': 60e3, 'h': 3600e3}
+
+def _number(pattern: str, text: str, default: float = np.nan) -> float:
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else default
+
+def _duration_ms(value: str) -> float:
+    """wrk durations such as 850.00us, 10.52ms, 1.20s or 2m"""
+    match = re.fullmatch(r'([\d.]+)(us|ms|s|m|h)', value)
+    if not match:
+        raise ValueError(f"Unrecognized duration: {value}")
+    return float(match.group(1)) * TIME_UNITS_MS[match.group(2)]
+
+def config_algorithm(config: str) -> str:
+    """'haproxy_wrr_tuned' -> 'Weighted Round Robin'; '' for unknown configs"""
+    policy = config.removesuffix('.cfg').removeprefix('haproxy_').split('_')[0]
+    return CONFIG_ALGORITHMS.get(policy, '')
+
+def parse_ab(text: str) -> Dict:
+    """Fields of one ApacheBench (ab) report"""
+    if not re.search(r'^Requests per second:', text, re.MULTILINE):
+        raise ValueError("not a complete ab report (no 'Requests per second' line)")
+    host = re.search(r'^Server Hostname:\s*(\S+)', text, re.MULTILINE)
+    port = re.search(r'^Server Port:\s*(\d+)', text, re.MULTILINE)
+    path = re.search(r'^Document Path:\s*(\S+)', text, re.MULTILINE)
+    record = {
+        'url': f"http://{host.group(1)}:{port.group(1)}{path.group(1)}" if host and port and path else '',
+        'concurrency': int(_number(r'^Concurrency Level:\s*(\d+)', text, 0)),
+        'duration_s': _number(r'^Time taken for tests:\s*([\d.]+)', text),
+        'requests': int(_number(r'^Complete requests:\s*(\d+)', text, 0)),
+        'failed': int(_number(r'^Failed requests:\s*(\d+)', text, 0)),
+        'non_2xx': int(_number(r'^Non-2xx responses:\s*(\d+)', text, 0)),
+        'requests_per_second': _number(r'^Requests per second:\s*([\d.]+)', text),
+        # The first "Time per request" line is the mean latency of one request
+        'latency_mean_ms': _number(r'^Time per request:\s*([\d.]+) \[ms\] \(mean\)$', text),
+        'latency_max_ms': _number(r'^\s*100%\s+(\d+)', text)
+    }
+    for percentile in PERCENTILES:
+        record[f'latency_p{percentile}_ms'] = _number(rf'^\s*{percentile}%\s+(\d+)\s*$', text)
+    return record
+
+def parse_wrk(text: str) -> Dict:
+    """Fields of one wrk report; percentiles need wrk --latency"""
+    if not re.search(r'^Requests/sec:', text, re.MULTILINE):
+        raise ValueError("not a complete wrk report (no 'Requests/sec' line)")
+    url = re.search(r'^Running \S+ test @ (\S+)', text, re.MULTILINE)
+    latency = re.search(r'^\s*Latency\s+(\S+)\s+\S+\s+(\S+)', text, re.MULTILINE)
+    totals = re.search(r'^\s*(\d+) requests in ([\d.]+\w+)', text, re.MULTILINE)
+    socket_errors = re.search(r'Socket errors: connect (\d+), read (\d+), write (\d+), timeout (\d+)', text)
+    record = {
+        'url': url.group(1) if url else '',
+        'concurrency': int(_number(r'(\d+) connections', text, 0)),
+        'duration_s': _duration_ms(totals.group(2)) / 1e3 if totals else np.nan,
+        'requests': int(totals.group(1)) if totals else 0,
+        'failed': sum(int(count) for count in socket_errors.groups()) if socket_errors else 0,
+        'non_2xx': int(_number(r'Non-2xx or 3xx responses:\s*(\d+)', text, 0)),
+        'requests_per_second': _number(r'^Requests/sec:\s*([\d.]+)', text),
+        'latency_mean_ms': _duration_ms(latency.group(1)) if latency else np.nan,
+        'latency_max_ms': _duration_ms(latency.group(2)) if latency else np.nan
+    }
+    distribution = dict(re.findall(r'^\s+(\d+)%\s+([\d.]+(?:us|ms|s|m|h))\s*$', text, re.MULTILINE))
+    for percentile in PERCENTILES:
+        value = distribution.get(str(percentile))
+        record[f'latency_p{percentile}_ms'] = _duration_ms(value) if value else np.nan
+    return record
+
+PARSERS = {'ab': parse_ab, 'wrk': parse_wrk}
+
+def parse_result_file(path: str) -> Dict:
+    """One table row: the report's fields plus tool, config, algorithm and timestamp from the file name"""
+    name = os.path.basename(path)
+    tool = name.split('_', 1)[0]
+    match = FILE_NAMES[tool].match(name)
+    with open(path, errors='replace') as f:
+        record = {'file': name, 'tool': tool}
+        record.update(PARSERS[tool](f.read()))
+    
+    config = (match.group('config') or '') if match else ''
+    if match:
+        timestamp = datetime.strptime(match.group('timestamp'), '%Y%m%d_%H%M%S')
+    else:
+        timestamp = datetime.fromtimestamp(os.stat(path).st_mtime).replace(microsecond=0)
+    record.update({'config': config, 'algorithm': config_algorithm(config), 'timestamp': timestamp.isoformat()})
+    return record
+
+def parser_version() -> str:
+    return code_version(parse_ab, parse_wrk, parse_result_file, _duration_ms, config_algorithm)
+
+def ingest(results_dir: str = 'results', store: ResultStore = None) -> List[Dict]:
+    """Parse every ab/wrk report in results_dir and return one record per report
+
+    Parsed reports are cached in a ResultStore under a key of the file name,
+    size, modification time and parser version, so only new or changed
+    files are read. Reports that cannot be parsed are skipped with a warning.
+    """
+    store = store if store is not None else ResultStore(os.path.join(results_dir, 'benchmark_store'))
+    version = parser_version()
+    keys = []
+    with os.scandir(results_dir) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            tool = entry.name.split('_', 1)[0]
+            if tool not in PARSERS or not entry.name.endswith('.txt') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            key = cell_key(version=version, file=entry.name, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            if key not in store:
+                try:
+                    store.put(key, parse_result_file(entry.path))
+                except (ValueError, OSError) as e:
+                    print(f"Skipping {entry.path}: {e}", file=sys.stderr)
+                    continue
+            keys.append(key)
+    store.flush()
+    return store.records(keys)
+
+def load_benchmarks(results_dir: str = 'results', store_path: str = None) -> 'pd.DataFrame':
+    """All ab/wrk reports in results_dir as a DataFrame indexed by (config, tool, timestamp)"""
+    import pandas as pd
+    store = ResultStore(store_path or os.path.join(results_dir, 'benchmark_store'))
+    benchmarks = pd.DataFrame(ingest(results_dir, store))
+    if benchmarks.empty:
+        return benchmarks
+    benchmarks['timestamp'] = pd.to_datetime(benchmarks['timestamp'])
+    return benchmarks.set_index(['config', 'tool', 'timestamp']).sort_index()
+
+def benchmark_summary(benchmarks: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Mean measured throughput, latency and failure rate per algorithm, titled for analyze_results"""
+    import pandas as pd
+    measured = benchmarks[benchmarks['algorithm'] != ''] if not benchmarks.empty else benchmarks
+    if measured.empty:
+        return pd.DataFrame(columns=['Algorithm'])
+    measured = measured.assign(failed_percent=100 * (measured['failed'] + measured['non_2xx']) / measured['requests'].clip(lower=1))
+    return (measured.groupby('algorithm')
+            .agg(**{'Measured Runs': ('requests_per_second', 'size'),
+                    'Measured Requests/sec': ('requests_per_second', 'mean'),
+                    'Measured p50 (ms)': ('latency_p50_ms', 'mean'),
+                    'Measured p99 (ms)': ('latency_p99_ms', 'mean'),
+                    'Measured Failed %': ('failed_percent', 'mean')})
+            .rename_axis('Algorithm')
+            .reset_index())
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse ab and wrk reports into one table')
+    parser.add_argument('results_dir', nargs='?', default='results')
+    parser.add_argument('--store', default=None, help='Parsed report cache (default: <results_dir>/benchmark_store)')
+    parser.add_argument('--csv', default=None, help='Also write the full table here')
+    args = parser.parse_args()
+    
+    benchmarks = load_benchmarks(args.results_dir, args.store)
+    print(f"📄 {len(benchmarks)} ab/wrk reports in {args.results_dir}")
+    if benchmarks.empty:
+        return
+    if args.csv:
+        benchmarks.to_csv(args.csv)
+        print(f"✅ Table written to {args.csv}")
+    print(benchmark_summary(benchmarks).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import numpy as np
+from simulation import DISTRIBUTIONS, ALGORITHMS, make_balancer, generate_requests
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+def measure(run: Callable[[], None], ops: int, setup: Callable[[], None] = None, warmup: int = 1, repeat: int = 7) -> List[float]:
+    """Time `run` (which performs `ops` operations) and return ns/op per repetition
+
+    `setup` runs before every call but outside the timed region.
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        run()
+        elapsed = time.perf_counter_ns() - start
+        if i >= warmup:
+            samples.append(elapsed / ops)
+    return samples
+
+def balancer_cases(server_counts: List[int], distributions: List[str], num_requests: int, seed: int) -> Dict[str, Callable]:
+    """Benchmark cases for the balancer hot paths, keyed by a stable name"""
+    cases = {}
+    variants = [(name, {}) for name in ALGORITHMS] + [('Least Connection', {'index': 'tree'}), ('Weighted Round Robin', {'schedule': 'smooth'})]
+    for dist_idx, dist_name in enumerate(distributions):
+        dist, params = DISTRIBUTIONS[dist_name]
+        requests = generate_requests(num_requests, dist, rng=np.random.default_rng([seed, dist_idx]), **params)
+        request_list = requests.tolist()
+        for num_servers in server_counts:
+            for algorithm, options in variants:
+                label = algorithm + ''.join(f" ({value})" for value in options.values())
+                balancer = make_balancer(algorithm, num_servers, history='off', **options)
+                
+                def scalar(balancer=balancer):
+                    assign = balancer.assign_request
+                    for request in request_list:
+                        assign(request)
+                
+                def batch(balancer=balancer, requests=requests):
+                    balancer.assign_batch(requests)
+                
+                key = f"{label}/{num_servers}/{dist}"
+                cases[f"assign_request/{key}"] = (scalar, len(request_list), balancer.reset)
+                cases[f"assign_batch/{key}"] = (batch, len(request_list), balancer.reset)
+    return cases
+
+def metrics_cases(server_counts: List[int], calls: int = 1000) -> Dict[str, Callable]:
+    cases = {}
+    for num_servers in server_counts:
+        balancer = make_balancer('Round Robin', num_servers, history='off')
+        balancer.assign_batch(np.random.default_rng(num_servers).lognormal(0.0, 0.5, num_servers * 4))
+        
+        def metrics(balancer=balancer):
+            for _ in range(calls):
+                balancer.get_load_metrics()
+        
+        cases[f"get_load_metrics/{num_servers}"] = (metrics, calls, None)
+    return cases
+
+def generation_cases(distributions: List[str], num_requests: int, seed: int) -> Dict[str, Callable]:
+    cases = {}
+    for dist_name in distributions:
+        dist, params = DISTRIBUTIONS[dist_name]
+        rng = np.random.default_rng(seed)
+        
+        def generate(dist=dist, params=params, rng=rng):
+            generate_requests(num_requests, dist, rng=rng, **params)
+        
+        cases[f"generate_requests/{dist}"] = (generate, num_requests, None)
+    return cases
+
+def environment() -> Dict:
+    """Describe the checkout and interpreter a baseline was recorded on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+def run_suite(args) -> Dict:
+    distributions = [name for name in DISTRIBUTIONS if DISTRIBUTIONS[name][0] in args.distributions]
+    cases = {}
+    cases.update(balancer_cases(args.server_counts, distributions, args.requests, args.seed))
+    cases.update(metrics_cases(args.server_counts))
+    cases.update(generation_cases(distributions, args.requests, args.seed))
+    if args.filter:
+        cases = {name: case for name, case in cases.items() if args.filter in name}
+    
+    results = {}
+    for name, (run, ops, setup) in cases.items():
+        samples = measure(run, ops, setup, args.warmup, args.repeat)
+        results[name] = {'ops': ops, 'samples_ns': samples, 'median_ns': float(np.median(samples))}
+        print(f"  {name:<60} {results[name]['median_ns']:>12.1f} ns/op")
+        sys.stdout.flush()
+    return {'environment': environment(), 'config': vars(args), 'results': results}
+
+def compare(baseline: Dict, current: Dict, alpha: float = 0.01, threshold: float = 0.05) -> List[str]:
+    """Flag cases whose current samples are significantly slower than the baseline
+
+    A case regresses when a one-sided Mann-Whitney U test rejects "not
+    slower" at `alpha` and the median slowed down by more than `threshold`.
+    """
+    from scipy.stats import mannwhitneyu
+    
+    regressions = []
+    print(f"{'benchmark':<60} {'base ns/op':>12} {'new ns/op':>12} {'change':>9}  verdict")
+    print("-" * 105)
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        old = baseline['results'][name]['samples_ns']
+        new = current['results'][name]['samples_ns']
+        old_median = float(np.median(old))
+        new_median = float(np.median(new))
+        change = new_median / old_median - 1.0
+        verdict = ''
+        if change > threshold and mannwhitneyu(new, old, alternative='greater').pvalue < alpha:
+            verdict = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold and mannwhitneyu(new, old, alternative='less').pvalue < alpha:
+            verdict = 'faster'
+        print(f"{name:<60} {old_median:>12.1f} {new_median:>12.1f} {change:>+8.1%}  {verdict}")
+    missing = sorted(set(baseline['results']) ^ set(current['results']))
+    if missing:
+        print(f"\n{len(missing)} benchmarks only present in one file were skipped")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for balancer hot paths with JSON baselines')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='Run the suite and store a JSON baseline')
+    run_parser.add_argument('--output', default='results/benchmarks/baseline.json')
+    run_parser.add_argument('--server-counts', type=int, nargs='+', default=[3, 100, 10000])
+    run_parser.add_argument('--distributions', nargs='+', default=[dist for dist, _ in DISTRIBUTIONS.values()])
+    run_parser.add_argument('--requests', type=int, default=20000)
+    run_parser.add_argument('--warmup', type=int, default=1)
+    run_parser.add_argument('--repeat', type=int, default=7)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this string')
+    compare_parser = subparsers.add_parser('compare', help='Compare two baselines, e.g. from two checkouts')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--alpha', type=float, default=0.01)
+    compare_parser.add_argument('--threshold', type=float, default=0.05, help='Minimum relative slowdown to report')
+    args = parser.parse_args()
+    
+    if args.command == 'run':
+        print(f"⏱️  Running benchmark suite ({args.repeat} repetitions, {args.warmup} warmup)")
+        report = run_suite(args)
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"✅ Baseline saved to {args.output}")
+        return
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.alpha, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} significant slowdowns")
+        sys.exit(1)
+    print("\n✅ No significant slowdowns")
+
+if __name__ == "__main__":
+    main()
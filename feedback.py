@@ -0,0 +1,268 @@
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import argparse
+import re
+import sys
+import threading
+import time
+
+# Utilization metrics a MetricsPoller can derive from exporter output
+METRICS = ('cpu', 'connections')
+
+SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+LABEL_PAIR = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def parse_exposition(text: str) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+    """Samples of a Prometheus text exposition, as {name: [(labels, value), ...]}"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        labels = {key: raw.replace('\\"', '"').replace('\\n', '\n').replace('\\\\', '\\')
+                  for key, raw in LABEL_PAIR.findall(labels or '')}
+        samples.setdefault(name, []).append((labels, float(value)))
+    return samples
+
+def cpu_seconds(samples: Dict) -> Tuple[float, float]:
+    """(idle, total) CPU seconds summed over cores, from node_exporter's node_cpu_seconds_total"""
+    idle = total = 0.0
+    for labels, value in samples.get('node_cpu_seconds_total', []):
+        total += value
+        if labels.get('mode') == 'idle':
+            idle += value
+    return idle, total
+
+class DelayedFeedback:
+    """Utilization feedback computed from a balancer's own loads, for simulation
+
+    Every `scrape_every` requests it "scrapes" each server's current load
+    and reports it as utilization: the load over a capacity of `headroom`
+    times the mean load, so evenly loaded servers read 1 / headroom and a
+    server carrying headroom times its share reads 1.0. A scrape becomes
+    visible to the balancer `delay` requests later, which models exporter,
+    scrape and propagation lag; the balancer keeps correcting an imbalance
+    it no longer has until the next scrape arrives.
+    """
+    
+    def __init__(self, scrape_every: int = 100, delay: int = 0, headroom: float = 1.25):
+        if scrape_every < 1 or delay < 0:
+            raise ValueError("scrape_every must be positive and delay non-negative")
+        if headroom <= 0:
+            raise ValueError("headroom must be positive")
+        self.scrape_every = scrape_every
+        self.delay = delay
+        self.headroom = headroom
+        self.balancer = None
+        self.reset()
+    
+    def attach(self, balancer):
+        self.balancer = balancer
+        self.reset()
+    
+    def reset(self):
+        self.next_scrape = self.scrape_every
+        self.pending = deque()
+        self.current = None
+    
+    def snapshot(self) -> Optional[np.ndarray]:
+        balancer = self.balancer
+        requests = balancer.total_requests
+        if requests >= self.next_scrape:
+            loads = balancer.server_loads
+            mean = loads.mean()
+            utilization = np.clip(loads / (self.headroom * mean), 0.0, 1.0) if mean > 0 else np.zeros(len(loads))
+            self.pending.append((requests + self.delay, utilization))
+            self.next_scrape = requests + self.scrape_every
+        while self.pending and self.pending[0][0] <= requests:
+            self.current = self.pending.popleft()[1]
+        return self.current
+
+class MetricsPoller:
+    """Background scraper of one Prometheus endpoint per backend
+
+    A daemon thread scrapes every target concurrently each `interval`
+    seconds over keep-alive connections (one per target, reused across
+    rounds) and publishes a new utilization array. snapshot() only reads
+    that attribute, so routing never waits on the network. A target whose
+    last good scrape is older than `ttl` counts as unknown and takes the
+    mean of the known ones; with none known, snapshot() is None.
+
+    metric='cpu' reads node_exporter's node_cpu_seconds_total and reports
+    the busy fraction between consecutive scrapes; metric='connections'
+    reads nginx_connections_active (nginx-prometheus-exporter) over
+    `capacity` connections.
+    """
+    
+    def __init__(self, urls: List[str], metric: str = 'cpu', interval: float = 1.0, ttl: float = 5.0,
+                 timeout: float = 0.5, capacity: float = 256):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        self.urls = list(urls)
+        self.metric = metric
+        self.interval = interval
+        self.ttl = ttl
+        self.timeout = timeout
+        self.capacity = capacity
+        self.connections = [None] * len(self.urls)
+        self.counters = [None] * len(self.urls)
+        self.values = [np.nan] * len(self.urls)
+        self.updated = [-np.inf] * len(self.urls)
+        self.scrapes = 0
+        self.errors = 0
+        self.current = None
+        self.stopped = threading.Event()
+        self.thread = None
+        self.pool = None
+    
+    def _fetch(self, target: int) -> str:
+        # Imported here: http.client costs more than the rest of startup
+        import http.client
+        parts = urlsplit(self.urls[target])
+        path = (parts.path or '/metrics') + (f'?{parts.query}' if parts.query else '')
+        for attempt in range(2):
+            if self.connections[target] is None:
+                self.connections[target] = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=self.timeout)
+            connection = self.connections[target]
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                body = response.read().decode()
+                if response.status != 200:
+                    raise OSError(f"HTTP {response.status} from {self.urls[target]}")
+                return body
+            except (http.client.HTTPException, OSError):
+                # A dropped keep-alive connection is retried once on a new one
+                connection.close()
+                self.connections[target] = None
+                if attempt:
+                    raise
+    
+    def _scrape(self, target: int) -> Optional[float]:
+        samples = parse_exposition(self._fetch(target))
+        if self.metric == 'connections':
+            active = sum(value for _, value in samples.get('nginx_connections_active', []))
+            return min(active / self.capacity, 1.0)
+        idle, total = cpu_seconds(samples)
+        previous = self.counters[target]
+        self.counters[target] = (idle, total)
+        if previous is None or total <= previous[1]:
+            return None  # A rate needs two scrapes (or the counters were reset)
+        return min(max(1.0 - (idle - previous[0]) / (total - previous[1]), 0.0), 1.0)
+    
+    def poll(self):
+        """Scrape every target once, concurrently, and publish a new snapshot"""
+        if self.pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.pool = ThreadPoolExecutor(max_workers=len(self.urls), thread_name_prefix='metrics-poller')
+        futures = [self.pool.submit(self._scrape, target) for target in range(len(self.urls))]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                self.errors += 1
+                results.append(None)
+        now = time.monotonic()
+        for target, value in enumerate(results):
+            if value is not None:
+                self.values[target] = value
+                self.updated[target] = now
+        self.scrapes += 1
+        
+        fresh = np.array([now - updated <= self.ttl for updated in self.updated])
+        if not fresh.any():
+            self.current = None
+            return
+        values = np.array(self.values)
+        # Published as a new array, so the balancer sees each snapshot once
+        self.current = np.where(fresh, values, values[fresh].mean())
+    
+    def snapshot(self) -> Optional[np.ndarray]:
+        return self.current
+    
+    def _run(self):
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            self.poll()
+            self.stopped.wait(max(self.interval - (time.monotonic() - started), 0.0))
+    
+    def start(self) -> 'MetricsPoller':
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name='metrics-poller', daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for connection in self.connections:
+            if connection is not None:
+                connection.close()
+        self.connections = [None] * len(self.urls)
+    
+    def __enter__(self) -> 'MetricsPoller':
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Load feedback tools: lag sweep in simulation, or poll live exporters')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    lag_parser = subparsers.add_parser('lag', help='Balance of the Load Feedback balancer against feedback delay')
+    lag_parser.add_argument('--delays', type=int, nargs='+', default=[0, 100, 1000, 5000], help='Feedback delay in requests')
+    lag_parser.add_argument('--scrape-every', type=int, default=100)
+    lag_parser.add_argument('--headroom', type=float, default=1.25)
+    lag_parser.add_argument('--servers', type=int, default=3)
+    lag_parser.add_argument('--requests', type=int, default=12000)
+    lag_parser.add_argument('--runs', type=int, default=5)
+    lag_parser.add_argument('--seed', type=int, default=42)
+    
+    poll_parser = subparsers.add_parser('poll', help='Print utilization snapshots scraped from exporters')
+    poll_parser.add_argument('urls', nargs='+', help='One exporter URL per backend, e.g. http://10.0.0.2:9100/metrics')
+    poll_parser.add_argument('--metric', default='cpu', choices=METRICS)
+    poll_parser.add_argument('--interval', type=float, default=1.0)
+    poll_parser.add_argument('--capacity', type=float, default=256, help='Connections at full utilization (connections metric)')
+    poll_parser.add_argument('--count', type=int, default=5, help='Snapshots to print')
+    args = parser.parse_args()
+    
+    if args.command == 'poll':
+        with MetricsPoller(args.urls, args.metric, args.interval, capacity=args.capacity) as poller:
+            for _ in range(args.count):
+                time.sleep(args.interval)
+                snapshot = poller.snapshot()
+                print(f"scrapes {poller.scrapes:>4}  errors {poller.errors:>3}  utilization "
+                      f"{'n/a' if snapshot is None else np.round(snapshot, 3).tolist()}")
+                sys.stdout.flush()
+        return
+    
+    from simulation import DISTRIBUTIONS, generate_requests, make_balancer, request_seed, run_simulation
+    print(f"{'delay':>7} {'distribution':<26} {'jain':>8} {'max/mean':>9}")
+    print("-" * 54)
+    for delay in args.delays:
+        for dist_idx, (dist_name, (dist, params)) in enumerate(DISTRIBUTIONS.items()):
+            feedback = DelayedFeedback(args.scrape_every, delay, args.headroom)
+            balancer = make_balancer('Load Feedback', args.servers, feedback=feedback, history='off')
+            scores = []
+            for run in range(args.runs):
+                rng = np.random.default_rng(request_seed(args.seed, run, dist_idx))
+                metrics, _ = run_simulation(balancer, generate_requests(args.requests, dist, rng=rng, **params))
+                scores.append((metrics['balance_score'], metrics['max_load'] / metrics['mean_load']))
+            balance, imbalance = np.mean(scores, axis=0)
+            print(f"{delay:>7} {dist_name:<26} {balance:>8.5f} {imbalance:>9.4f}")
+            sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import numpy as np
+from typing import Callable, Dict, List
+from bisect import bisect_left
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the decision latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (1e-7, 2.5e-7, 5e-7, 1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 1e-3)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Instrumentation:
+    """Decision counters, decision latency histogram and routed load for one balancer
+
+    Created by LoadBalancer.enable_instrumentation(), which wraps that
+    instance's public assignment methods with timed versions; balancers that
+    never enable it run the plain methods. Counters are Python lists because
+    single-element updates on them are cheaper than on NumPy arrays.
+    """
+    
+    def __init__(self, num_servers: int, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.bounds_ns = [bound * 1e9 for bound in self.buckets]
+        self.decisions = [0] * num_servers
+        self.routed = [0.0] * num_servers
+        self.window_start = [0.0] * num_servers
+        self.latency_counts = [0] * (len(self.buckets) + 1)
+        self.latency_sum_ns = 0
+    
+    def grow(self, num_servers: int):
+        """Extend the per-server counters in place after servers are added"""
+        extra = num_servers - len(self.decisions)
+        if extra > 0:
+            self.decisions += [0] * extra
+            self.routed += [0.0] * extra
+            self.window_start += [0.0] * extra
+    
+    def wrap(self, method: Callable) -> Callable:
+        """Time a scalar assignment method whose last argument is the request load"""
+        decisions = self.decisions
+        routed = self.routed
+        latency_counts = self.latency_counts
+        bounds_ns = self.bounds_ns
+        perf_counter_ns = time.perf_counter_ns
+        
+        def timed(*args):
+            start = perf_counter_ns()
+            server_idx = method(*args)
+            elapsed = perf_counter_ns() - start
+            decisions[server_idx] += 1
+            routed[server_idx] += args[-1]
+            latency_counts[bisect_left(bounds_ns, elapsed)] += 1
+            self.latency_sum_ns += elapsed
+            return server_idx
+        return timed
+    
+    def wrap_batch(self, method: Callable) -> Callable:
+        """Time a batch assignment method; each decision is observed at the batch's mean latency"""
+        def timed(loads):
+            start = time.perf_counter_ns()
+            indices = method(loads)
+            elapsed = time.perf_counter_ns() - start
+            if len(indices):
+                num_servers = len(self.decisions)
+                counts = np.bincount(indices, minlength=num_servers)
+                routed = np.bincount(indices, weights=np.asarray(loads, dtype=np.float64), minlength=num_servers)
+                # Updated in place: the scalar wrappers hold these lists
+                self.decisions[:] = (np.array(self.decisions) + counts).tolist()
+                self.routed[:] = (np.array(self.routed) + routed).tolist()
+                self.latency_counts[bisect_left(self.bounds_ns, elapsed / len(indices))] += len(indices)
+                self.latency_sum_ns += elapsed
+            return indices
+        return timed
+    
+    def window_fairness(self) -> float:
+        """Jain's index over the load routed since the previous call"""
+        window = np.array(self.routed) - np.array(self.window_start)
+        self.window_start = list(self.routed)
+        total = window.sum()
+        squares = np.dot(window, window)
+        return float(total * total / (len(window) * squares)) if squares > 0 else 1.0
+
+def _labels(**labels) -> str:
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+def exposition(balancers: Dict[str, 'LoadBalancer']) -> str:
+    """Render instrumented balancers in the Prometheus text exposition format
+
+    Balancers are labelled by their dict key. Reading the windowed fairness
+    starts a new window, so call this once per scrape or textfile write.
+    """
+    families = {
+        'lb_decisions_total': ('counter', 'Requests assigned to each server', []),
+        'lb_routed_load_total': ('counter', 'Load assigned to each server, ignoring releases', []),
+        'lb_decision_latency_seconds': ('histogram', 'Time taken by each assignment decision', []),
+        'lb_server_load': ('gauge', 'Current load on each server', []),
+        'lb_fairness_index': ('gauge', "Jain's fairness index of current server loads", []),
+        'lb_window_fairness_index': ('gauge', "Jain's fairness index of load routed since the previous export", []),
+    }
+    for name, balancer in balancers.items():
+        instrumentation = balancer.instrumentation
+        for server_idx, load in enumerate(balancer.server_loads.tolist()):
+            families['lb_server_load'][2].append(f"lb_server_load{_labels(balancer=name, server=server_idx)} {load!r}")
+        families['lb_fairness_index'][2].append(f"lb_fairness_index{_labels(balancer=name)} {balancer._fairness()[2]!r}")
+        if instrumentation is None:
+            continue
+        
+        for server_idx, (count, routed) in enumerate(zip(instrumentation.decisions, instrumentation.routed)):
+            labels = _labels(balancer=name, server=server_idx)
+            families['lb_decisions_total'][2].append(f"lb_decisions_total{labels} {count}")
+            families['lb_routed_load_total'][2].append(f"lb_routed_load_total{labels} {routed!r}")
+        cumulative = np.cumsum(instrumentation.latency_counts).tolist()
+        for bound, count in zip(instrumentation.buckets + ['+Inf'], cumulative):
+            families['lb_decision_latency_seconds'][2].append(
+                f"lb_decision_latency_seconds_bucket{_labels(balancer=name, le=bound)} {count}")
+        families['lb_decision_latency_seconds'][2].append(
+            f"lb_decision_latency_seconds_sum{_labels(balancer=name)} {instrumentation.latency_sum_ns / 1e9!r}")
+        families['lb_decision_latency_seconds'][2].append(
+            f"lb_decision_latency_seconds_count{_labels(balancer=name)} {cumulative[-1]}")
+        families['lb_window_fairness_index'][2].append(
+            f"lb_window_fairness_index{_labels(balancer=name)} {instrumentation.window_fairness()!r}")
+    
+    lines = []
+    for name, (kind, description, samples) in families.items():
+        if samples:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"] + samples
+    return '\n'.join(lines) + '\n'
+
+def write_textfile(path: str, text: str):
+    """Write an exposition for node_exporter's textfile collector
+
+    The file is written under a temporary name and renamed, so the collector
+    never reads a partial file. Point --collector.textfile.directory at its
+    directory; the name must end in .prom.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+def serve_metrics(render: Callable[[], str], port: int, host: str = '0.0.0.0') -> 'ThreadingHTTPServer':
+    """Serve render() at /metrics from a daemon thread; call shutdown() on the result to stop"""
+    # Imported here: http.server alone costs more than the rest of startup
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            payload = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@contextmanager
+def capture(prefix: str, profile: bool = True, memory: bool = True, top: int = 25):
+    """Profile the enclosed block with cProfile and/or tracemalloc
+
+    Writes <prefix>.prof (open with pstats or snakeviz) and
+    <prefix>.memory.txt (current and peak traced memory plus the top
+    allocation sites).
+    """
+    import cProfile
+    import tracemalloc
+    
+    os.makedirs(os.path.dirname(prefix) or '.', exist_ok=True)
+    profiler = cProfile.Profile() if profile else None
+    if memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(prefix + '.prof')
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(prefix + '.memory.txt', 'w') as f:
+                f.write(f"current {current} bytes, peak {peak} bytes\n")
+                for stat in snapshot.statistics('lineno')[:top]:
+                    f.write(f"{stat}\n")
@@ -0,0 +1,106 @@
+import numpy as np
+from typing import Dict
+
+class LatencyHistogram:
+    """Mergeable log-bucketed histogram for streaming latency percentiles
+
+    Buckets grow geometrically by (1 + precision), so any reported
+    percentile is within `precision` relative error of the true value,
+    HDR-histogram style, with constant memory. Histograms built with the same
+    (lowest, highest, precision) can be merged by adding their counts.
+    """
+    
+    def __init__(self, lowest: float = 1e-6, highest: float = 1e5, precision: float = 0.01):
+        if not 0 < lowest < highest:
+            raise ValueError("Histogram range must satisfy 0 < lowest < highest")
+        if precision <= 0:
+            raise ValueError("Histogram precision must be positive")
+        self.lowest = lowest
+        self.highest = highest
+        self.precision = precision
+        self.log_base = np.log1p(precision)
+        # Bucket 0 catches values below `lowest`, the last one values above `highest`
+        self.num_buckets = int(np.ceil(np.log(highest / lowest) / self.log_base)) + 2
+        self.counts = np.zeros(self.num_buckets, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+    
+    def record(self, value: float):
+        """Record a single value"""
+        self.record_many(np.array([value], dtype=np.float64))
+    
+    def record_many(self, values: np.ndarray):
+        """Record an array of values with one vectorized pass"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            buckets = np.floor(np.log(values / self.lowest) / self.log_base) + 1
+        buckets = np.clip(np.nan_to_num(buckets, nan=0.0, neginf=0.0), 0, self.num_buckets - 1).astype(np.intp)
+        self.counts += np.bincount(buckets, minlength=self.num_buckets)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+    
+    def merge(self, other: 'LatencyHistogram'):
+        """Add another histogram's samples into this one"""
+        if (self.lowest, self.highest, self.precision) != (other.lowest, other.highest, other.precision):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def percentile(self, q: float) -> float:
+        """Value at percentile q (0-100), reported as its bucket's upper bound"""
+        if self.count == 0:
+            return 0.0
+        rank = max(int(np.ceil(q / 100.0 * self.count)), 1)
+        bucket = int(np.searchsorted(np.cumsum(self.counts), rank))
+        value = self.lowest * (1.0 + self.precision) ** bucket
+        return min(max(value, self.min), self.max)
+    
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def summary(self, prefix: str = '') -> Dict:
+        """Count, mean, max and p50/p95/p99/p999 keyed with an optional prefix"""
+        return {
+            f'{prefix}count': self.count,
+            f'{prefix}mean': self.mean(),
+            f'{prefix}max': self.max if self.count else 0.0,
+            f'{prefix}p50': self.percentile(50),
+            f'{prefix}p95': self.percentile(95),
+            f'{prefix}p99': self.percentile(99),
+            f'{prefix}p999': self.percentile(99.9)
+        }
+    
+    def to_dict(self) -> Dict:
+        """Compact JSON-ready form that keeps only non-empty buckets"""
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            'lowest': self.lowest,
+            'highest': self.highest,
+            'precision': self.precision,
+            'buckets': nonzero.tolist(),
+            'counts': self.counts[nonzero].tolist(),
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        hist = cls(data['lowest'], data['highest'], data['precision'])
+        hist.counts[np.asarray(data['buckets'], dtype=np.intp)] = data['counts']
+        hist.count = data['count']
+        hist.total = data['total']
+        if data['count']:
+            hist.min = data['min']
+            hist.max = data['max']
+        return hist
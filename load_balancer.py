@@ -1,55 +1,294 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
+import bisect
+import hashlib
+import heapq
 import time
 from abc import ABC, abstractmethod
+from load_index import TournamentTree
+from request_history import RequestHistory, make_history
+from instrumentation import Instrumentation
+
+# Row layout of the fairness-over-time series recorded by enable_sampling()
+SAMPLE_DTYPE = np.dtype([
+    ('requests', np.int64),
+    ('balance_score', np.float64),
+    ('std_load', np.float64),
+    ('imbalance', np.float64)  # max_load / mean_load
+])
+
+# Minimum scalar updates between exact recomputes of the running totals
+RESYNC_INTERVAL = 4096
 
 class LoadBalancer(ABC):
-    def __init__(self, num_servers: int):
+    # Public assignment methods timed by enable_instrumentation(); the load
+    # must be the last positional argument of each scalar one
+    INSTRUMENTED_METHODS = ('assign_request',)
+    # Whether assignments read server_loads; EventSimulation routes a whole
+    # chunk at once through balancers that do not
+    LOAD_AWARE = True
+    
+    def __init__(self, num_servers: int, history: Union[str, RequestHistory] = 'full'):
+        """history: 'off', 'ring' (recent requests only), 'full' (columnar,
+        growable) or a RequestHistory instance such as one that spills to disk"""
         self.num_servers = num_servers
         self.server_loads = np.zeros(num_servers)
-        self.request_history = []
+        self.request_history = make_history(history)
         self.total_requests = 0
         self.start_time = time.time()
+        self.sample_every = 0
+        self.samples = np.zeros(0, dtype=SAMPLE_DTYPE)
+        self.instrumentation = None
+        self._reset_totals()
         
     @abstractmethod
     def assign_request(self, request_load: float) -> int:
         """Assign a request to a server and return the server index"""
         pass
     
+    def assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        """Assign a batch of requests in order and return their server indices
+
+        With sampling enabled the batch is split at sample points, so samples
+        are taken after the same requests as on the scalar path. Both paths
+        choose the same servers and end with the same loads, but the sampled
+        statistics match only to floating-point rounding: the running sums
+        are updated per batch rather than per request.
+        """
+        loads = np.asarray(loads, dtype=np.float64)
+        if not self.sample_every:
+            indices = self._assign_batch(loads)
+            self._sync_totals()
+            return indices
+        
+        parts = []
+        start = 0
+        while start < len(loads):
+            stop = min(len(loads), start + self.next_sample - self.total_requests)
+            parts.append(self._assign_batch(loads[start:stop]))
+            self._sync_totals()
+            if self.total_requests == self.next_sample:
+                self._take_sample()
+            start = stop
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+    
+    def _assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        """Batch path without sampling or running totals
+
+        Subclasses override this with array-based paths; every override must
+        leave server_loads, counters and history exactly as the scalar loop
+        would.
+        """
+        # The class method, so an instrumented instance counts the batch once
+        assign = type(self).assign_request
+        indices = np.empty(len(loads), dtype=np.intp)
+        for i, request_load in enumerate(loads):
+            indices[i] = assign(self, request_load)
+        return indices
+    
+    def _record(self, server_idx: int, request_load: float) -> float:
+        """Apply one assignment to loads, running totals, counters and history; return the new load"""
+        loads = self.server_loads
+        old_load = loads.item(server_idx)
+        new_load = old_load + request_load
+        loads[server_idx] = new_load
+        # Running totals keep get_load_metrics O(1); only the touched server
+        # changes. Same update as _update_totals, inlined for the hot path.
+        sum_loads = self.sum_loads
+        self.squared_deviations += request_load * (2.0 * (old_load - sum_loads * self.inv_servers) + request_load * self.deviation_scale)
+        self.sum_loads = sum_loads + request_load
+        if new_load > self.max_load:
+            self.max_load = new_load
+        self.total_requests += 1
+        self.request_history.append(server_idx, request_load)
+        if self.total_requests >= self.next_checkpoint:
+            self._checkpoint()
+        return new_load
+    
+    def _record_batch(self, indices: np.ndarray, loads: np.ndarray):
+        """Apply a batch of assignments to loads, counters and history"""
+        # np.add.at accumulates unbuffered and in order, so the floating point
+        # sums match the scalar += sequence bit for bit
+        np.add.at(self.server_loads, indices, loads)
+        self.total_requests += len(loads)
+        self.request_history.extend(indices, loads)
+    
+    def _update_totals(self, old_load: float, delta: float):
+        # Σx and Σx² are tracked as Σx and M2 = Σ(x - mean)², with
+        # Σx² = M2 + (Σx)²/n. Changing one server by delta moves M2 by
+        # delta * (2 * (x_old - mean) + delta * (1 - 1/n)), which stays
+        # accurate where Σx²/n - mean² would cancel once loads grow large.
+        self.squared_deviations += delta * (2.0 * (old_load - self.sum_loads * self.inv_servers) + delta * self.deviation_scale)
+        self.sum_loads += delta
+    
+    def _reset_totals(self):
+        n = self.num_servers
+        self.inv_servers = 1.0 / n if n else 0.0
+        self.deviation_scale = 1.0 - self.inv_servers
+        self.resync_interval = max(n, RESYNC_INTERVAL)
+        self.num_samples = 0
+        self.next_sample = self.sample_every if self.sample_every else -1
+        self._sync_totals()
+    
+    def _sync_totals(self):
+        """Recompute the running totals exactly with one O(n) vectorized pass
+
+        Done after every batch and every resync_interval scalar updates:
+        rounding in Σx biases the mean the incremental update relies on, and
+        the periodic recompute bounds that drift at O(1) amortized cost.
+        """
+        loads = self.server_loads
+        self.sum_loads = float(loads.sum())
+        deviations = loads - self.sum_loads * self.inv_servers
+        self.squared_deviations = float(np.dot(deviations, deviations))
+        self.max_load = float(loads.max()) if self.num_servers else float('-inf')
+        self.max_stale = False
+        self.pending_releases = 0
+        self.next_resync = self.total_requests + self.resync_interval
+        self._set_checkpoint()
+    
+    def _set_checkpoint(self):
+        # _record compares a single counter; both resyncs and samples hang off it
+        if self.next_sample > 0:
+            self.next_checkpoint = min(self.next_resync, self.next_sample)
+        else:
+            self.next_checkpoint = self.next_resync
+    
+    def _checkpoint(self):
+        if self.total_requests >= self.next_resync:
+            self._sync_totals()
+        if self.total_requests == self.next_sample:
+            self._take_sample()
+    
+    def _release(self, server_idx: int, request_load: float) -> float:
+        old_load = self.server_loads.item(server_idx)
+        new_load = old_load - request_load
+        self.server_loads[server_idx] = new_load
+        self._update_totals(old_load, -request_load)
+        if old_load >= self.max_load:
+            # The maximum may have moved to another server; find it when next needed
+            self.max_stale = True
+        self.pending_releases += 1
+        if self.pending_releases >= self.resync_interval:
+            self._sync_totals()
+        return new_load
+    
+    def release_request(self, server_idx: int, request_load: float):
+        """Remove a finished request's load from its server"""
+        self._release(server_idx, request_load)
+    
     def get_server_loads(self) -> np.ndarray:
         """Get current load of all servers"""
         return self.server_loads
     
-    def get_load_metrics(self) -> Dict:
-        """Calculate load balancing metrics using Jain's Fairness Index"""
-        current_time = time.time()
-        elapsed_time = current_time - self.start_time
-        
-        # Calculate basic load metrics
-        loads = self.server_loads
-        mean_load = np.mean(loads)
-        std_load = np.std(loads)
-        
+    def set_server_loads(self, loads: np.ndarray):
+        """Replace this balancer's view of the server loads, e.g. with state
+        synced from other balancers in a tier; counters and history are kept"""
+        self.server_loads[:] = loads
+        self._sync_totals()
+    
+    def get_request_history(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (server indices, request loads) as zero-copy views"""
+        return self.request_history.view()
+    
+    def enable_sampling(self, every: int, capacity: int = 1024):
+        """Record fairness, std and max/mean imbalance every `every` requests
+
+        Rows go into a preallocated SAMPLE_DTYPE array that doubles when full;
+        each sample is O(1). Pass every=0 to stop sampling.
+        """
+        if every < 0:
+            raise ValueError("Sampling interval must be non-negative")
+        self.sample_every = every
+        self.samples = np.zeros(max(capacity, 1) if every else 0, dtype=SAMPLE_DTYPE)
+        self.num_samples = 0
+        self.next_sample = self.total_requests + every if every else -1
+        self._set_checkpoint()
+    
+    def get_samples(self) -> np.ndarray:
+        """Get the recorded fairness-over-time series as a view"""
+        return self.samples[:self.num_samples]
+    
+    def enable_instrumentation(self) -> Instrumentation:
+        """Count and time every decision and track routed load per server
+
+        Wraps this instance's assignment methods with timed versions, so
+        balancers that never enable it keep the plain hot path. Export with
+        instrumentation.exposition(); see MONITORING.md.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation(self.num_servers)
+            for name in self.INSTRUMENTED_METHODS:
+                setattr(self, name, self.instrumentation.wrap(getattr(self, name)))
+            self.assign_batch = self.instrumentation.wrap_batch(self.assign_batch)
+        return self.instrumentation
+    
+    def _grow_servers(self, count: int = 1):
+        """Append empty servers at runtime, keeping existing loads and totals"""
+        self.num_servers += count
+        self.server_loads = np.concatenate((self.server_loads, np.zeros(count)))
+        self.inv_servers = 1.0 / self.num_servers
+        self.deviation_scale = 1.0 - self.inv_servers
+        self.resync_interval = max(self.num_servers, RESYNC_INTERVAL)
+        self._sync_totals()
+        if self.instrumentation is not None:
+            self.instrumentation.grow(self.num_servers)
+    
+    def _current_max(self) -> float:
+        if self.max_stale:
+            self.max_load = float(self.server_loads.max())
+            self.max_stale = False
+        return self.max_load
+    
+    def _current_min(self) -> float:
+        return float(self.server_loads.min()) if self.num_servers else float('inf')
+    
+    def _fairness(self) -> Tuple[float, float, float]:
+        """(mean, std, Jain's index) from the running totals in O(1)"""
         # Calculate Jain's Fairness Index for load balancing
-        # J = (Σx_i)² / (n * Σx_i²)
+        # J = (Σx_i)² / (n * Σx_i²), with n * Σx_i² = n * M2 + (Σx_i)²
         # Range: [1/n, 1], where 1 is perfectly fair/balanced
-        n = len(loads)
+        n = self.num_servers
         if n == 0:
-            balance_score = 0.0
+            return 0.0, 0.0, 0.0
+        mean_load = self.sum_loads / n
+        squared_deviations = max(self.squared_deviations, 0.0)
+        std_load = (squared_deviations / n) ** 0.5
+        squared_sum = self.sum_loads ** 2
+        n_sum_squared_loads = n * squared_deviations + squared_sum
+        if n_sum_squared_loads <= 0:
+            balance_score = 1.0  # All servers have zero load
         else:
-            sum_loads = sum(loads)
-            sum_squared_loads = sum(load**2 for load in loads)
-            
-            if sum_squared_loads == 0:
-                balance_score = 1.0  # All servers have zero load
-            else:
-                balance_score = (sum_loads**2) / (n * sum_squared_loads)
+            balance_score = squared_sum / n_sum_squared_loads
+        return mean_load, std_load, balance_score
+    
+    def _take_sample(self):
+        if self.num_samples == len(self.samples):
+            grown = np.zeros(2 * len(self.samples), dtype=SAMPLE_DTYPE)
+            grown[:self.num_samples] = self.samples
+            self.samples = grown
+        mean_load, std_load, balance_score = self._fairness()
+        imbalance = self._current_max() / mean_load if mean_load > 0 else 1.0
+        self.samples[self.num_samples] = (self.total_requests, balance_score, std_load, imbalance)
+        self.num_samples += 1
+        self.next_sample += self.sample_every
+        self._set_checkpoint()
+    
+    def get_load_metrics(self) -> Dict:
+        """Calculate load balancing metrics using Jain's Fairness Index
+
+        Mean, std and the index come from running sums, so this is O(1);
+        only min_load (and max_load after releases) needs a pass over servers.
+        """
+        current_time = time.time()
+        elapsed_time = current_time - self.start_time
+        mean_load, std_load, balance_score = self._fairness()
         
         return {
             'mean_load': mean_load,
             'std_load': std_load,
-            'max_load': np.max(loads),
-            'min_load': np.min(loads),
+            'max_load': self._current_max(),
+            'min_load': self._current_min(),
             'balance_score': balance_score,
             'requests_per_second': self.total_requests / elapsed_time if elapsed_time > 0 else 0,
             'total_requests': self.total_requests
@@ -58,57 +297,463 @@ class LoadBalancer(ABC):
     def reset(self):
         """Reset the load balancer state"""
         self.server_loads = np.zeros(self.num_servers)
-        self.request_history = []
+        self.request_history.clear()
         self.total_requests = 0
         self.start_time = time.time()
+        self._reset_totals()
 
 class RoundRobinLoadBalancer(LoadBalancer):
-    def __init__(self, num_servers: int):
-        super().__init__(num_servers)
+    LOAD_AWARE = False
+    
+    def __init__(self, num_servers: int, history: Union[str, RequestHistory] = 'full'):
+        super().__init__(num_servers, history)
         self.current_server = 0
     
     def assign_request(self, request_load: float) -> int:
         server_idx = self.current_server
-        self.server_loads[server_idx] += request_load
         self.current_server = (self.current_server + 1) % self.num_servers
-        self.total_requests += 1
-        self.request_history.append((server_idx, request_load))
+        self._record(server_idx, request_load)
         return server_idx
+    
+    def _assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        indices = (self.current_server + np.arange(len(loads))) % self.num_servers
+        self.current_server = (self.current_server + len(loads)) % self.num_servers
+        self._record_batch(indices, loads)
+        return indices
 
 class LeastConnectionLoadBalancer(LoadBalancer):
+    INDEXES = ('scan', 'tree')
+    
+    def __init__(self, num_servers: int, index: str = 'scan', history: Union[str, RequestHistory] = 'full'):
+        """index='scan' runs np.argmin per request (O(n)); index='tree' keeps
+        a tournament tree for O(log n) selection on large pools. Both break
+        ties towards the lowest server index."""
+        super().__init__(num_servers, history)
+        if index not in self.INDEXES:
+            raise ValueError(f"Unknown index: {index}")
+        self.index = index
+        self.load_index = TournamentTree(self.server_loads) if index == 'tree' else None
+    
     def assign_request(self, request_load: float) -> int:
-        server_idx = np.argmin(self.server_loads)
-        self.server_loads[server_idx] += request_load
-        self.total_requests += 1
-        self.request_history.append((server_idx, request_load))
+        if self.load_index is not None:
+            server_idx = self.load_index.argmin()
+            self.load_index.update(server_idx, self._record(server_idx, request_load))
+        else:
+            server_idx = np.argmin(self.server_loads)
+            self._record(server_idx, request_load)
         return server_idx
+    
+    def release_request(self, server_idx: int, request_load: float):
+        new_load = self._release(server_idx, request_load)
+        if self.load_index is not None:
+            self.load_index.update(server_idx, new_load)
+    
+    def set_server_loads(self, loads: np.ndarray):
+        super().set_server_loads(loads)
+        if self.load_index is not None:
+            self.load_index = TournamentTree(self.server_loads)
+    
+    def _current_min(self) -> float:
+        if self.load_index is not None:
+            return self.load_index.loads[self.load_index.argmin()]
+        return super()._current_min()
+    
+    def _assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        if self.load_index is not None:
+            indices = self._assign_batch_tree(loads)
+        else:
+            indices = self._assign_batch_heap(loads)
+        self.total_requests += len(loads)
+        self.request_history.extend(indices, loads)
+        return indices
+    
+    def _assign_batch_heap(self, loads: np.ndarray) -> np.ndarray:
+        # Each decision depends on the previous one, so this stays sequential.
+        # A heap of (load, index) pops the lowest load with the lowest index on
+        # ties, exactly like argmin, and runs in plain Python floats.
+        heap = [(load, idx) for idx, load in enumerate(self.server_loads.tolist())]
+        heapq.heapify(heap)
+        indices = np.empty(len(loads), dtype=np.intp)
+        for i, request_load in enumerate(loads.tolist()):
+            load, server_idx = heap[0]
+            heapq.heapreplace(heap, (load + request_load, server_idx))
+            indices[i] = server_idx
+        for load, server_idx in heap:
+            self.server_loads[server_idx] = load
+        return indices
+    
+    def _assign_batch_tree(self, loads: np.ndarray) -> np.ndarray:
+        load_index = self.load_index
+        server_loads = load_index.loads
+        indices = np.empty(len(loads), dtype=np.intp)
+        for i, request_load in enumerate(loads.tolist()):
+            server_idx = load_index.argmin()
+            load_index.update(server_idx, server_loads[server_idx] + request_load)
+            indices[i] = server_idx
+        self.server_loads[:] = server_loads[:self.num_servers]
+        return indices
+    
+    def reset(self):
+        super().reset()
+        if self.load_index is not None:
+            self.load_index = TournamentTree(self.server_loads)
 
 class WeightedRoundRobinLoadBalancer(LoadBalancer):
-    def __init__(self, num_servers: int, weights: List[float]):
-        super().__init__(num_servers)
+    SCHEDULES = ('burst', 'smooth')
+    LOAD_AWARE = False
+    
+    def __init__(self, num_servers: int, weights: List[float], schedule: str = 'burst', history: Union[str, RequestHistory] = 'full'):
+        """schedule='burst' sends each server its weight's worth of requests
+        in a row; schedule='smooth' interleaves them the way nginx's smooth
+        weighted round robin does. Both give every server the same share per
+        cycle, and both precompute that cycle so assignment is a lookup."""
+        super().__init__(num_servers, history)
         if len(weights) != num_servers:
             raise ValueError("Number of weights must match number of servers")
         if not all(w > 0 for w in weights):
             raise ValueError("All weights must be positive")
+        if schedule not in self.SCHEDULES:
+            raise ValueError(f"Unknown schedule: {schedule}")
             
         self.weights = np.array(weights)
-        self.current_server = 0
-        self.weight_counter = 0
+        self.schedule = schedule
         self.max_weight = max(weights)
         
         # Calculate weight ratios
         self.weight_ratios = self.weights / self.max_weight
         
-    def assign_request(self, request_load: float) -> int:
-        server_idx = self.current_server
-        self.server_loads[server_idx] += request_load
-        self.weight_counter += 1
+        # Requests each server takes per cycle, laid out as one full cycle.
+        # ceil(weight) directly: weight_ratios * max_weight can round up past
+        # an integer weight (7 / 25 * 25 > 7) and add a request to the cycle.
+        run_lengths = np.maximum(np.ceil(self.weights), 1).astype(np.intp)
+        if schedule == 'smooth':
+            self.cycle = self._smooth_cycle(run_lengths)
+        else:
+            self.cycle = np.repeat(np.arange(num_servers), run_lengths)
+        self.cycle_list = self.cycle.tolist()
+        self.position = 0
+    
+    @staticmethod
+    def _smooth_cycle(run_lengths: np.ndarray) -> np.ndarray:
+        """One cycle of smooth WRR: every step adds each weight to its
+        server's credit, picks the highest credit (lowest index on ties) and
+        charges it the total weight"""
+        total = int(run_lengths.sum())
+        credit = np.zeros(len(run_lengths), dtype=np.int64)
+        cycle = np.empty(total, dtype=np.intp)
+        for step in range(total):
+            credit += run_lengths
+            server_idx = int(np.argmax(credit))
+            credit[server_idx] -= total
+            cycle[step] = server_idx
+        return cycle
         
-        # Decide whether to switch to the next server based on the weight ratio
-        if self.weight_counter >= self.weight_ratios[server_idx] * self.max_weight:
-            self.current_server = (self.current_server + 1) % self.num_servers
-            self.weight_counter = 0
-            
-        self.total_requests += 1
-        self.request_history.append((server_idx, request_load))
-        return server_idx 
\ No newline at end of file
+    def assign_request(self, request_load: float) -> int:
+        position = self.position
+        server_idx = self.cycle_list[position]
+        position += 1
+        self.position = 0 if position == len(self.cycle_list) else position
+        self._record(server_idx, request_load)
+        return server_idx
+    
+    def _assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        cycle_len = len(self.cycle)
+        stop = self.position + len(loads)
+        indices = np.tile(self.cycle, -(-stop // cycle_len))[self.position:stop]
+        self.position = stop % cycle_len
+        self._record_batch(indices, loads)
+        return indices
+
+class PowerOfChoicesLoadBalancer(LoadBalancer):
+    """Power-of-d-choices: sample d servers, send to the least loaded
+
+    O(d) per request whatever the pool size, yet close to least connection
+    in balance. Candidates come from a seeded Generator in pre-drawn blocks;
+    reset() rewinds the stream, so runs are reproducible and the scalar and
+    batch paths make identical choices. Ties go to the earlier candidate.
+    """
+    
+    CANDIDATE_BLOCK = 4096
+    
+    def __init__(self, num_servers: int, choices: int = 2, seed: int = 0, history: Union[str, RequestHistory] = 'full'):
+        super().__init__(num_servers, history)
+        if choices < 1:
+            raise ValueError("Number of choices must be at least 1")
+        self.choices = choices
+        self.seed = seed
+        self._reset_candidates()
+    
+    def _reset_candidates(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.candidates = []
+        self.candidate_pos = 0
+    
+    def _next_candidates(self) -> List[int]:
+        if self.candidate_pos == len(self.candidates):
+            self.candidates = self.rng.integers(0, self.num_servers, size=(self.CANDIDATE_BLOCK, self.choices)).tolist()
+            self.candidate_pos = 0
+        row = self.candidates[self.candidate_pos]
+        self.candidate_pos += 1
+        return row
+    
+    def assign_request(self, request_load: float) -> int:
+        loads = self.server_loads
+        candidates = self._next_candidates()
+        server_idx = candidates[0]
+        best_load = loads.item(server_idx)
+        for candidate in candidates[1:]:
+            load = loads.item(candidate)
+            if load < best_load:
+                server_idx = candidate
+                best_load = load
+        self._record(server_idx, request_load)
+        return server_idx
+    
+    def _assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        server_loads = self.server_loads.tolist()
+        indices = np.empty(len(loads), dtype=np.intp)
+        for i, request_load in enumerate(loads.tolist()):
+            candidates = self._next_candidates()
+            server_idx = candidates[0]
+            best_load = server_loads[server_idx]
+            for candidate in candidates[1:]:
+                if server_loads[candidate] < best_load:
+                    server_idx = candidate
+                    best_load = server_loads[candidate]
+            server_loads[server_idx] = best_load + request_load
+            indices[i] = server_idx
+        self.server_loads[:] = server_loads
+        self.total_requests += len(loads)
+        self.request_history.extend(indices, loads)
+        return indices
+    
+    def reset(self):
+        super().reset()
+        self._reset_candidates()
+
+MASK64 = (1 << 64) - 1
+
+def hash_key(key) -> int:
+    """Stable 64-bit hash: splitmix64 for integers, BLAKE2b for anything else"""
+    if isinstance(key, (int, np.integer)):
+        z = (int(key) + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+def hash_keys(keys: np.ndarray) -> np.ndarray:
+    """Vectorized splitmix64 of integer keys, equal to hash_key element-wise"""
+    z = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+class ConsistentHashLoadBalancer(LoadBalancer):
+    """Consistent hashing with virtual nodes and bounded loads
+
+    Each server owns `virtual_nodes` points on a 64-bit ring kept as a sorted
+    list; a key goes to the first point clockwise of its hash (bisect, O(log
+    n)). With bounded loads a server only accepts a request while its load
+    stays within load_factor times the mean active load, otherwise the
+    request spills to the next distinct server on the ring, so affinity
+    holds until a server runs hot.
+
+    Requests without a key (as in the simulation) draw a client id from a
+    seeded stream over `num_keys` clients. Servers can be added and removed
+    at runtime; a removed server keeps its index and load but leaves the
+    ring, so only its keys move.
+    """
+    
+    INSTRUMENTED_METHODS = ('assign_request', 'assign_key')
+    KEY_BLOCK = 4096
+    
+    def __init__(self, num_servers: int, virtual_nodes: int = 100, load_factor: float = 1.25,
+                 num_keys: int = 10000, seed: int = 0, history: Union[str, RequestHistory] = 'full'):
+        super().__init__(num_servers, history)
+        if virtual_nodes < 1:
+            raise ValueError("Number of virtual nodes must be at least 1")
+        if load_factor < 1:
+            raise ValueError("Load factor must be at least 1")
+        self.virtual_nodes = virtual_nodes
+        self.load_factor = load_factor
+        self.num_keys = num_keys
+        self.seed = seed
+        # The whole ring is sorted once, by point and then server index
+        points = np.array([point for server_idx in range(num_servers) for point in self._server_points(server_idx)],
+                          dtype=np.uint64)
+        servers = np.repeat(np.arange(num_servers), virtual_nodes)
+        order = np.lexsort((servers, points))
+        self.ring_points = points[order].tolist()
+        self.ring_servers = servers[order].tolist()
+        self.active = [True] * num_servers
+        self.active_count = num_servers
+        self._reset_keys()
+    
+    def _server_points(self, server_idx: int) -> List[int]:
+        return [hash_key(f'server{server_idx}#{v}') for v in range(self.virtual_nodes)]
+    
+    def _add_to_ring(self, server_idx: int):
+        # The new server has the highest index, so it goes after equal points
+        for point in self._server_points(server_idx):
+            pos = bisect.bisect_right(self.ring_points, point)
+            self.ring_points.insert(pos, point)
+            self.ring_servers.insert(pos, server_idx)
+        self.active.append(True)
+        self.active_count += 1
+    
+    def add_server(self) -> int:
+        """Add a server to the pool and ring without a reset; returns its index"""
+        self._grow_servers(1)
+        server_idx = self.num_servers - 1
+        self._add_to_ring(server_idx)
+        return server_idx
+    
+    def remove_server(self, server_idx: int):
+        """Take a server off the ring; its keys move to the next servers clockwise"""
+        if not self.active[server_idx]:
+            raise ValueError(f"Server {server_idx} is not active")
+        if self.active_count == 1:
+            raise ValueError("Cannot remove the last active server")
+        kept = [(point, server) for point, server in zip(self.ring_points, self.ring_servers) if server != server_idx]
+        self.ring_points = [point for point, _ in kept]
+        self.ring_servers = [server for _, server in kept]
+        self.active[server_idx] = False
+        self.active_count -= 1
+    
+    def release_request(self, server_idx: int, request_load: float):
+        self.routed_load -= request_load
+        super().release_request(server_idx, request_load)
+    
+    def set_server_loads(self, loads: np.ndarray):
+        super().set_server_loads(loads)
+        # The load bound follows the synced total
+        self.routed_load = float(self.server_loads.sum())
+    
+    def _reset_keys(self):
+        # The bound uses its own running total (not the periodically resynced
+        # sum_loads) so scalar and batch paths take identical decisions
+        self.routed_load = 0.0
+        self.rng = np.random.default_rng(self.seed)
+        self.key_hashes = []
+        self.key_pos = 0
+    
+    def _next_key_hash(self) -> int:
+        if self.key_pos == len(self.key_hashes):
+            self.key_hashes = hash_keys(self.rng.integers(0, self.num_keys, self.KEY_BLOCK)).tolist()
+            self.key_pos = 0
+        key_hash = self.key_hashes[self.key_pos]
+        self.key_pos += 1
+        return key_hash
+    
+    def _choose(self, key_hash: int, request_load: float, loads: List[float], routed_load: float) -> int:
+        ring_servers = self.ring_servers
+        ring_size = len(ring_servers)
+        pos = bisect.bisect_left(self.ring_points, key_hash) % ring_size
+        first = ring_servers[pos]
+        bound = self.load_factor * (routed_load + request_load) / self.active_count
+        if loads[first] + request_load <= bound:
+            return first
+        # Spill clockwise to the first distinct server with room
+        tried = {first}
+        for step in range(1, ring_size):
+            server_idx = ring_servers[(pos + step) % ring_size]
+            if server_idx in tried:
+                continue
+            if loads[server_idx] + request_load <= bound:
+                return server_idx
+            tried.add(server_idx)
+        return first
+    
+    def assign_key(self, key, request_load: float) -> int:
+        """Route a request for a specific key (client id, session, URL)"""
+        return self._assign_hash(hash_key(key), request_load)
+    
+    def _assign_hash(self, key_hash: int, request_load: float) -> int:
+        server_idx = self._choose(key_hash, request_load, self.server_loads, self.routed_load)
+        self.routed_load += request_load
+        self._record(server_idx, request_load)
+        return server_idx
+    
+    def assign_request(self, request_load: float) -> int:
+        return self._assign_hash(self._next_key_hash(), request_load)
+    
+    def _assign_batch(self, loads: np.ndarray) -> np.ndarray:
+        server_loads = self.server_loads.tolist()
+        routed_load = self.routed_load
+        indices = np.empty(len(loads), dtype=np.intp)
+        for i, request_load in enumerate(loads.tolist()):
+            server_idx = self._choose(self._next_key_hash(), request_load, server_loads, routed_load)
+            server_loads[server_idx] += request_load
+            routed_load += request_load
+            indices[i] = server_idx
+        self.server_loads[:] = server_loads
+        self.routed_load = routed_load
+        self.total_requests += len(loads)
+        self.request_history.extend(indices, loads)
+        return indices
+    
+    def reset(self):
+        super().reset()
+        self._reset_keys()
+
+class FeedbackLoadBalancer(LoadBalancer):
+    """Routes by externally reported backend utilization (0 idle, 1 saturated)
+
+    `feedback` is any object whose snapshot() returns the latest per-server
+    utilizations, or None while nothing is known, without blocking:
+    feedback.MetricsPoller for live exporters, feedback.DelayedFeedback in
+    simulation. Each server's weight is its headroom, max(1 - utilization,
+    min_weight), and requests follow a smooth weighted round robin over
+    those weights, recomputed whenever a new snapshot appears. With no
+    snapshot all weights are equal.
+    """
+    
+    def __init__(self, num_servers: int, feedback=None, min_weight: float = 0.05, history: Union[str, RequestHistory] = 'full'):
+        super().__init__(num_servers, history)
+        if not 0 < min_weight <= 1:
+            raise ValueError("Minimum weight must be in (0, 1]")
+        self.feedback = feedback
+        self.min_weight = min_weight
+        if hasattr(feedback, 'attach'):
+            feedback.attach(self)
+        self._reset_weights()
+    
+    def _reset_weights(self):
+        self.snapshot = None
+        self.weights = [1.0] * self.num_servers
+        self.total_weight = float(self.num_servers)
+        self.credits = [0.0] * self.num_servers
+    
+    def _refresh_weights(self):
+        snapshot = self.feedback.snapshot() if self.feedback is not None else None
+        if snapshot is self.snapshot:
+            return
+        self.snapshot = snapshot
+        if snapshot is None:
+            headroom = np.ones(self.num_servers)
+        else:
+            headroom = np.maximum(1.0 - np.asarray(snapshot, dtype=np.float64), self.min_weight)
+        self.weights = headroom.tolist()
+        self.total_weight = float(headroom.sum())
+    
+    def assign_request(self, request_load: float) -> int:
+        self._refresh_weights()
+        credits = self.credits
+        server_idx = 0
+        best = float('-inf')
+        for i, weight in enumerate(self.weights):
+            credit = credits[i] + weight
+            credits[i] = credit
+            if credit > best:
+                server_idx = i
+                best = credit
+        credits[server_idx] -= self.total_weight
+        self._record(server_idx, request_load)
+        return server_idx
+    
+    def reset(self):
+        super().reset()
+        if hasattr(self.feedback, 'reset'):
+            self.feedback.reset()
+        self._reset_weights()
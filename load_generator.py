@@ -0,0 +1,193 @@
+import numpy as np
+from latency_histogram import LatencyHistogram
+from proxy import HTTPError, read_head, read_body, header_value
+from simulation import DISTRIBUTIONS, generate_requests
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+def distribution_mean(distribution: str, params: Dict) -> float:
+    """Theoretical mean of a generate_requests distribution"""
+    if distribution == 'lognormal':
+        return float(np.exp(params.get('mean', 0.0) + params.get('sigma', 0.5) ** 2 / 2))
+    elif distribution == 'exponential':
+        return params.get('scale', 1.0)
+    elif distribution == 'uniform':
+        return (params.get('low', 0.5) + params.get('high', 1.5)) / 2
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+def arrival_schedule(rate: float, duration: float, distribution: str, rng: np.random.Generator) -> np.ndarray:
+    """Send offsets (seconds) whose gaps follow a request distribution scaled to `rate`"""
+    dist, params = DISTRIBUTIONS[distribution]
+    scale = 1.0 / (rate * distribution_mean(dist, params))
+    offsets = np.empty(0)
+    while len(offsets) == 0 or offsets[-1] < duration:
+        gaps = generate_requests(max(int(rate * duration * 0.1), 16), dist, rng=rng, **params) * scale
+        start = offsets[-1] if len(offsets) else 0.0
+        offsets = np.concatenate((offsets, start + np.cumsum(gaps)))
+    return offsets[offsets < duration]
+
+class OpenLoopWorker:
+    """Sends requests on a fixed schedule, whether or not earlier ones finished
+
+    Latency is measured from each request's intended send time, so queueing
+    in the client, the proxy or the backend shows up in the percentiles
+    instead of silently lowering the offered rate (coordinated omission).
+    """
+    
+    def __init__(self, url: str, max_connections: int = 256, timeout: float = 10.0):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError("Only http:// URLs are supported")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.request = f'GET {self.path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: spe-loadgen\r\n\r\n'.encode()
+        self.timeout = timeout
+        self.connections = asyncio.Semaphore(max_connections)
+        self.idle = []
+        self.histogram = LatencyHistogram()
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+    
+    async def _connection(self):
+        while self.idle:
+            reader, writer = self.idle.pop()
+            # The server may have closed an idle connection in the meantime
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_connection(self.host, self.port)
+    
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(self.request)
+        await writer.drain()
+        status_line, headers = await read_head(reader)
+        closes = header_value(headers, 'connection').lower() == 'close'
+        await read_body(reader, headers, until_close=closes, method='GET', status=int(status_line.split(' ', 2)[1]))
+        return status_line, closes
+    
+    async def send(self, intended: float):
+        async with self.connections:
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(self._connection(), self.timeout)
+                # One deadline for head and body, so a stalled body cannot hold a connection slot
+                status_line, closes = await asyncio.wait_for(self._exchange(reader, writer), self.timeout)
+                status = status_line.split(' ', 2)[1]
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                if closes:
+                    writer.close()
+                else:
+                    self.idle.append((reader, writer))
+                self.latencies.append(time.perf_counter() - intended)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError, HTTPError):
+                if writer is not None:
+                    writer.close()
+                self.errors += 1
+    
+    async def run(self, offsets: np.ndarray) -> Dict:
+        tasks = []
+        start = time.perf_counter() + 0.05
+        for offset in offsets.tolist():
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(self.send(intended)))
+            if len(self.latencies) >= 4096:
+                self.histogram.record_many(np.array(self.latencies))
+                self.latencies = []
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        self.histogram.record_many(np.array(self.latencies))
+        for _, writer in self.idle:
+            writer.close()
+        return {
+            'sent': len(offsets),
+            'completed': self.histogram.count,
+            'errors': self.errors,
+            'statuses': self.statuses,
+            'elapsed': elapsed,
+            'histogram': self.histogram.to_dict()
+        }
+
+def run_worker(url: str, rate: float, duration: float, distribution: str, seed_sequence: np.random.SeedSequence,
+               max_connections: int, timeout: float) -> Dict:
+    """Entry point of one load generator process"""
+    offsets = arrival_schedule(rate, duration, distribution, np.random.default_rng(seed_sequence))
+    worker = OpenLoopWorker(url, max_connections, timeout)
+    return asyncio.run(worker.run(offsets))
+
+def run_load(url: str, rate: float, duration: float, distribution: str = 'Exponential Distribution', workers: int = 1,
+             max_connections: int = 256, seed: int = 42, timeout: float = 10.0) -> Dict:
+    """Split `rate` over worker processes and merge their histograms"""
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker, url, rate / workers, duration, distribution, seeds[i], max_connections, timeout)
+                   for i in range(workers)]
+        results = [future.result() for future in futures]
+    
+    merged = LatencyHistogram.from_dict(results[0]['histogram'])
+    for result in results[1:]:
+        merged.merge(LatencyHistogram.from_dict(result['histogram']))
+    statuses = {}
+    for result in results:
+        for status, count in result['statuses'].items():
+            statuses[status] = statuses.get(status, 0) + count
+    elapsed = max(result['elapsed'] for result in results)
+    report = {
+        'url': url,
+        'distribution': distribution,
+        'target_rate': rate,
+        'duration': duration,
+        'workers': workers,
+        'sent': sum(result['sent'] for result in results),
+        'completed': merged.count,
+        'errors': sum(result['errors'] for result in results),
+        'statuses': statuses,
+        'achieved_rate': merged.count / elapsed if elapsed > 0 else 0,
+        'timestamp': time.strftime('%Y%m%d_%H%M%S')
+    }
+    report.update(merged.summary(prefix='latency_'))
+    report['histogram'] = merged.to_dict()
+    report['per_worker'] = results
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop, multi-process HTTP load generator')
+    parser.add_argument('url')
+    parser.add_argument('--rate', type=float, default=1000, help='Target requests per second across all workers')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of traffic to send')
+    parser.add_argument('--distribution', default='Exponential Distribution', choices=list(DISTRIBUTIONS),
+                        help='Inter-arrival gap distribution (Exponential gives Poisson arrivals)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--max-connections', type=int, default=256, help='Concurrent connections per worker')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='loadgen', help='Prefix of the JSON file written to results/')
+    args = parser.parse_args()
+    
+    print(f"🚀 {args.rate:.0f} req/s for {args.duration:.0f}s against {args.url} ({args.workers} workers, {args.distribution})")
+    sys.stdout.flush()
+    report = run_load(args.url, args.rate, args.duration, args.distribution, args.workers, args.max_connections, args.seed, args.timeout)
+    
+    os.makedirs('results', exist_ok=True)
+    path = f"results/{args.label}_{int(args.rate)}rps_{report['timestamp']}.json"
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"  Achieved {report['achieved_rate']:.0f} req/s, {report['completed']} ok, {report['errors']} errors")
+    print(f"  Latency p50 {report['latency_p50'] * 1000:.2f} ms, p95 {report['latency_p95'] * 1000:.2f} ms, "
+          f"p99 {report['latency_p99'] * 1000:.2f} ms, p999 {report['latency_p999'] * 1000:.2f} ms")
+    print(f"✅ Results saved to {path}")
+
+if __name__ == "__main__":
+    main()
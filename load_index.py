@@ -0,0 +1,39 @@
+import numpy as np
+from typing import List
+
+class TournamentTree:
+    """Indexed min-structure over server loads with O(log n) updates
+
+    Every internal node stores the index of the least-loaded server in its
+    subtree. Ties go to the left child, which always holds the lower server
+    indices, so argmin() returns the same index as np.argmin.
+    """
+
+    def __init__(self, loads: np.ndarray):
+        self.num_servers = len(loads)
+        self.size = 1
+        while self.size < max(self.num_servers, 1):
+            self.size *= 2
+        # Padding leaves carry an infinite load and therefore never win
+        self.loads: List[float] = [float(x) for x in loads] + [float('inf')] * (self.size - self.num_servers)
+        self.tree: List[int] = [0] * self.size + list(range(self.size))
+        for node in range(self.size - 1, 0, -1):
+            left = self.tree[2 * node]
+            right = self.tree[2 * node + 1]
+            self.tree[node] = left if self.loads[left] <= self.loads[right] else right
+
+    def argmin(self) -> int:
+        """Index of the least-loaded server, lowest index on ties"""
+        return self.tree[1]
+
+    def update(self, server_idx: int, load: float):
+        """Set the load of one server and replay the matches above it"""
+        loads = self.loads
+        tree = self.tree
+        loads[server_idx] = load
+        node = (server_idx + self.size) >> 1
+        while node:
+            left = tree[2 * node]
+            right = tree[2 * node + 1]
+            tree[node] = left if loads[left] <= loads[right] else right
+            node >>= 1
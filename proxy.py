@@ -0,0 +1,312 @@
+import numpy as np
+from load_balancer import LoadBalancer, ConsistentHashLoadBalancer
+from latency_histogram import LatencyHistogram
+from instrumentation import CONTENT_TYPE, exposition
+from simulation import ALGORITHMS, make_balancer
+from feedback import METRICS, MetricsPoller
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+# Hop-by-hop headers a proxy must not forward (RFC 7230 section 6.1)
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-connection', 'te', 'trailer', 'upgrade'}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[str, List[Tuple[str, str]]]:
+    """Read a start line and headers; raises IncompleteReadError on a closed connection"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head[:-4].decode('latin-1').split('\r\n')
+    headers = []
+    for line in lines[1:]:
+        key, sep, value = line.partition(':')
+        if not sep:
+            raise HTTPError(400, 'Bad Request')
+        headers.append((key.strip(), value.strip()))
+    return lines[0], headers
+
+def header_value(headers: List[Tuple[str, str]], name: str) -> str:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return ''
+
+def has_body(method: str = '', status: int = 0) -> bool:
+    """False for responses that never carry a body, whatever their headers say (RFC 7230 section 3.3.3)"""
+    return method != 'HEAD' and not 100 <= status < 200 and status not in (204, 304)
+
+def is_framed(headers: List[Tuple[str, str]]) -> bool:
+    return bool(header_value(headers, 'content-length')) or 'chunked' in header_value(headers, 'transfer-encoding').lower()
+
+async def read_body(reader: asyncio.StreamReader, headers: List[Tuple[str, str]], until_close: bool = False,
+                    method: str = '', status: int = 0) -> bytes:
+    """Read a message body framed by Content-Length, chunked encoding or connection close
+
+    Pass the request method and response status when reading a response:
+    HEAD, 1xx, 204 and 304 responses have no body even with a Content-Length.
+    """
+    if not has_body(method, status):
+        return b''
+    if 'chunked' in header_value(headers, 'transfer-encoding').lower():
+        # Relay chunked bodies as-is, including the terminating chunk and trailers
+        parts = []
+        while True:
+            size_line = await reader.readuntil(b'\r\n')
+            parts.append(size_line)
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                while True:
+                    trailer = await reader.readuntil(b'\r\n')
+                    parts.append(trailer)
+                    if trailer == b'\r\n':
+                        return b''.join(parts)
+            parts.append(await reader.readexactly(size + 2))
+    length = header_value(headers, 'content-length')
+    if length:
+        return await reader.readexactly(int(length))
+    return await reader.read() if until_close else b''
+
+class BackendPool:
+    """Idle keep-alive connections to one backend"""
+    
+    def __init__(self, host: str, port: int, max_idle: int = 64):
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.idle = []
+        self.opened = 0
+    
+    async def acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port)
+    
+    def release(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, reusable: bool):
+        if reusable and len(self.idle) < self.max_idle and not writer.is_closing():
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+    
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+class ReverseProxy:
+    """asyncio HTTP/1.1 reverse proxy that routes with any LoadBalancer
+
+    Every request is assigned with load 1.0 and released when its response
+    has been relayed, so server_loads holds live in-flight requests and
+    LeastConnectionLoadBalancer behaves like HAProxy's leastconn.
+    ConsistentHashLoadBalancer is keyed by client address (like HAProxy's
+    `balance source`) for session affinity. Backend connections are kept
+    alive and pooled per server; a backend that does not connect within
+    `connect_timeout` or answer within `timeout` seconds gets a 504.
+    GET /__stats on the proxy itself returns per-backend counters and
+    latency percentiles, and GET /metrics the balancer's instrumentation
+    in Prometheus text format.
+    """
+    
+    def __init__(self, balancer: LoadBalancer, backends: List[Tuple[str, int]], max_idle: int = 64, name: str = None,
+                 connect_timeout: float = 5.0, timeout: float = 30.0):
+        if balancer.num_servers != len(backends):
+            raise ValueError("Number of backends must match the balancer's number of servers")
+        self.balancer = balancer
+        # A decision costs well under a microsecond against a network round
+        # trip, so the proxy always instruments its balancer
+        balancer.enable_instrumentation()
+        self.name = name or type(balancer).__name__
+        self.backends = backends
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.pools = [BackendPool(host, port, max_idle) for host, port in backends]
+        self.in_flight = [0] * len(backends)
+        self.completed = [0] * len(backends)
+        self.errors = [0] * len(backends)
+        self.latency = LatencyHistogram()
+        self.pending_latencies = []
+        self.started = time.time()
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        client_key = peer[0] if peer else ''
+        try:
+            while True:
+                try:
+                    request_line, headers = await read_head(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                body = await read_body(reader, headers)
+                keep_alive = header_value(headers, 'connection').lower() != 'close' and not request_line.endswith('HTTP/1.0')
+                
+                if request_line.startswith('GET /__stats '):
+                    payload = json.dumps(self.stats(), indent=4).encode()
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                                 + f'Content-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+                elif request_line.startswith('GET /metrics '):
+                    payload = exposition({self.name: self.balancer}).encode()
+                    writer.write(f'HTTP/1.1 200 OK\r\nContent-Type: {CONTENT_TYPE}\r\n'.encode()
+                                 + f'Content-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+                else:
+                    writer.write(await self.forward(request_line, headers, body, client_key))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            writer.write(f'HTTP/1.1 {e.status} {e.reason}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'.encode())
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request_line: str,
+                        headers: List[Tuple[str, str]], body: bytes) -> Tuple[str, List[Tuple[str, str]], bytes, bool, bool]:
+        """One request/response on a backend connection
+
+        Returns the status line, headers and body, whether the body was
+        unframed (read until close) and whether the connection can be reused.
+        """
+        out = [request_line]
+        out += [f'{key}: {value}' for key, value in headers if key.lower() not in HOP_BY_HOP]
+        out.append('Connection: keep-alive')
+        writer.write(('\r\n'.join(out) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+        
+        status_line, response_headers = await read_head(reader)
+        if not status_line.startswith('HTTP/'):
+            raise HTTPError(502, 'Bad Gateway')
+        method = request_line.split(' ', 1)[0]
+        status = int(status_line.split(' ', 2)[1])
+        backend_closes = header_value(response_headers, 'connection').lower() == 'close'
+        # A body with neither Content-Length nor chunked encoding ends when the backend closes
+        unframed = has_body(method, status) and not is_framed(response_headers)
+        response_body = await read_body(reader, response_headers, until_close=backend_closes or unframed,
+                                        method=method, status=status)
+        return status_line, response_headers, response_body, unframed, not (backend_closes or unframed)
+    
+    async def forward(self, request_line: str, headers: List[Tuple[str, str]], body: bytes, client_key: str = '') -> bytes:
+        """Send one request to the backend the balancer picks and return the raw response"""
+        if isinstance(self.balancer, ConsistentHashLoadBalancer):
+            server_idx = self.balancer.assign_key(client_key, 1.0)
+        else:
+            server_idx = int(self.balancer.assign_request(1.0))
+        self.in_flight[server_idx] += 1
+        pool = self.pools[server_idx]
+        start = time.perf_counter()
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(pool.acquire(), self.connect_timeout)
+            status_line, response_headers, response_body, unframed, reusable = await asyncio.wait_for(
+                self._exchange(reader, writer, request_line, headers, body), self.timeout)
+            pool.release(reader, writer, reusable=reusable)
+            writer = None
+            
+            out = [status_line]
+            out += [f'{key}: {value}' for key, value in response_headers if key.lower() not in HOP_BY_HOP]
+            if unframed:
+                # Read until close, but the client connection stays open: frame it
+                out.append(f'Content-Length: {len(response_body)}')
+            self.completed[server_idx] += 1
+            return ('\r\n'.join(out) + '\r\n\r\n').encode('latin-1') + response_body
+        except asyncio.TimeoutError:
+            if writer is not None:
+                writer.close()
+            self.errors[server_idx] += 1
+            return b'HTTP/1.1 504 Gateway Timeout\r\nContent-Length: 0\r\n\r\n'
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, HTTPError):
+            if writer is not None:
+                writer.close()
+            self.errors[server_idx] += 1
+            return b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n'
+        finally:
+            self.in_flight[server_idx] -= 1
+            self.balancer.release_request(server_idx, 1.0)
+            self.pending_latencies.append(time.perf_counter() - start)
+            if len(self.pending_latencies) >= 1024:
+                self._flush_latencies()
+    
+    def _flush_latencies(self):
+        self.latency.record_many(np.array(self.pending_latencies))
+        self.pending_latencies = []
+    
+    def stats(self) -> Dict:
+        self._flush_latencies()
+        elapsed = time.time() - self.started
+        stats = self.latency.summary(prefix='backend_latency_')
+        stats.update({
+            'backends': [f'{host}:{port}' for host, port in self.backends],
+            'completed': self.completed,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'connections_opened': [pool.opened for pool in self.pools],
+            'requests_per_second': sum(self.completed) / elapsed if elapsed > 0 else 0
+        })
+        return stats
+    
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+
+async def serve(proxy: ReverseProxy, host: str, port: int):
+    server = await asyncio.start_server(proxy.handle_client, host, port, backlog=4096)
+    print(f"🔀 Proxy listening on {host}:{port} -> {', '.join(f'{h}:{p}' for h, p in proxy.backends)}")
+    sys.stdout.flush()
+    try:
+        await server.serve_forever()
+    finally:
+        proxy.close()
+
+def parse_backend(spec: str) -> Tuple[str, int]:
+    host, _, port = spec.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def main():
+    parser = argparse.ArgumentParser(description='asyncio reverse proxy routed by the Python load balancing algorithms')
+    parser.add_argument('--listen', default='127.0.0.1:8080')
+    parser.add_argument('--backends', nargs='+', default=['127.0.0.1:8081', '127.0.0.1:8082', '127.0.0.1:8083'])
+    parser.add_argument('--algorithm', default='Least Connection', choices=ALGORITHMS)
+    parser.add_argument('--weights', type=float, nargs='+', default=None, help='WRR weights (default: 3 1 2 pattern)')
+    parser.add_argument('--max-idle', type=int, default=64, help='Idle keep-alive connections kept per backend')
+    parser.add_argument('--connect-timeout', type=float, default=5.0, help='Seconds to open a backend connection')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds for a backend to send its whole response')
+    parser.add_argument('--feedback-urls', nargs='+', default=None,
+                        help='Load Feedback: one exporter URL per backend, e.g. http://10.0.0.2:9100/metrics')
+    parser.add_argument('--feedback-metric', default='cpu', choices=METRICS)
+    parser.add_argument('--feedback-interval', type=float, default=1.0, help='Seconds between exporter scrapes')
+    args = parser.parse_args()
+    
+    backends = [parse_backend(spec) for spec in args.backends]
+    poller = None
+    if args.algorithm == 'Load Feedback':
+        if not args.feedback_urls or len(args.feedback_urls) != len(backends):
+            parser.error("Load Feedback needs --feedback-urls with one URL per backend")
+        poller = MetricsPoller(args.feedback_urls, args.feedback_metric, args.feedback_interval).start()
+    balancer = make_balancer(args.algorithm, len(backends), weights=args.weights, history='off', feedback=poller)
+    proxy = ReverseProxy(balancer, backends, args.max_idle, name=args.algorithm, connect_timeout=args.connect_timeout,
+                         timeout=args.timeout)
+    host, port = parse_backend(args.listen)
+    try:
+        try:
+            import uvloop  # Optional; roughly doubles throughput when installed
+            uvloop.run(serve(proxy, host, port))
+        except ImportError:
+            asyncio.run(serve(proxy, host, port))
+    except KeyboardInterrupt:
+        print(json.dumps(proxy.stats(), indent=4))
+    finally:
+        if poller is not None:
+            poller.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import numpy as np
+from typing import Tuple, Union
+import os
+from abc import ABC, abstractmethod
+
+SERVER_DTYPE = np.int32
+LOAD_DTYPE = np.float32
+
+class RequestHistory(ABC):
+    """Per-request (server index, load) record kept by a LoadBalancer"""
+    
+    @abstractmethod
+    def append(self, server_idx: int, request_load: float):
+        """Record a single assignment"""
+        pass
+    
+    @abstractmethod
+    def extend(self, indices: np.ndarray, loads: np.ndarray):
+        """Record a batch of assignments in order"""
+        pass
+    
+    @abstractmethod
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (server indices, loads) as NumPy views without copying"""
+        pass
+    
+    @abstractmethod
+    def clear(self):
+        """Drop all recorded assignments"""
+        pass
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+class NullHistory(RequestHistory):
+    """Records nothing; the cheapest choice when history is never read"""
+    
+    def append(self, server_idx: int, request_load: float):
+        pass
+    
+    def extend(self, indices: np.ndarray, loads: np.ndarray):
+        pass
+    
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.empty(0, dtype=SERVER_DTYPE), np.empty(0, dtype=LOAD_DTYPE)
+    
+    def clear(self):
+        pass
+    
+    def __len__(self) -> int:
+        return 0
+
+class RingHistory(RequestHistory):
+    """Keeps only the most recent `capacity` assignments in fixed arrays"""
+    
+    def __init__(self, capacity: int = 65536):
+        if capacity <= 0:
+            raise ValueError("Ring capacity must be positive")
+        self.capacity = capacity
+        self.servers = np.zeros(capacity, dtype=SERVER_DTYPE)
+        self.loads = np.zeros(capacity, dtype=LOAD_DTYPE)
+        self.total = 0  # Assignments seen since the last clear, including overwritten ones
+    
+    def append(self, server_idx: int, request_load: float):
+        pos = self.total % self.capacity
+        self.servers[pos] = server_idx
+        self.loads[pos] = request_load
+        self.total += 1
+    
+    def extend(self, indices: np.ndarray, loads: np.ndarray):
+        count = len(indices)
+        if count >= self.capacity:
+            # Only the tail survives; lay it out so the write position stays consistent
+            pos = (self.total + count - self.capacity) % self.capacity
+            self.servers[:] = np.roll(indices[-self.capacity:], pos)
+            self.loads[:] = np.roll(loads[-self.capacity:], pos)
+        else:
+            pos = self.total % self.capacity
+            first = min(count, self.capacity - pos)
+            self.servers[pos:pos + first] = indices[:first]
+            self.loads[pos:pos + first] = loads[:first]
+            self.servers[:count - first] = indices[first:]
+            self.loads[:count - first] = loads[first:]
+        self.total += count
+    
+    @property
+    def start(self) -> int:
+        """Storage position of the oldest record still held"""
+        return self.total % self.capacity if self.total > self.capacity else 0
+    
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Views in storage order; once wrapped, the oldest record is at `start`"""
+        size = len(self)
+        return self.servers[:size], self.loads[:size]
+    
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the held records in chronological order"""
+        servers, loads = self.view()
+        return np.roll(servers, -self.start), np.roll(loads, -self.start)
+    
+    def clear(self):
+        self.total = 0
+    
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+class ColumnarHistory(RequestHistory):
+    """Full history in int32/float32 columns that grow geometrically
+
+    With `spill_path` set, once the capacity would pass `spill_after` records
+    the columns move to memory-mapped files `<spill_path>.servers.npy` and
+    `<spill_path>.loads.npy`, so runs larger than RAM are backed by disk. The
+    files are sized to the capacity; only the first len(history) records are
+    valid.
+    """
+    
+    def __init__(self, initial_capacity: int = 1024, spill_path: str = None, spill_after: int = 1 << 24):
+        self.spill_path = spill_path
+        self.spill_after = spill_after
+        self.capacity = max(initial_capacity, 1)
+        self.servers = np.empty(self.capacity, dtype=SERVER_DTYPE)
+        self.loads = np.empty(self.capacity, dtype=LOAD_DTYPE)
+        self.size = 0
+    
+    @property
+    def spilled(self) -> bool:
+        return isinstance(self.servers, np.memmap)
+    
+    def _allocate(self, name: str, dtype, capacity: int) -> np.ndarray:
+        if self.spill_path is not None and capacity > self.spill_after:
+            path = f"{self.spill_path}.{name}.npy"
+            # Write the larger file next to the old one and swap it in once
+            # the contents are copied; the open mapping survives the rename
+            return np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=dtype, shape=(capacity,))
+        return np.empty(capacity, dtype=dtype)
+    
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype in (('servers', SERVER_DTYPE), ('loads', LOAD_DTYPE)):
+            old = getattr(self, name)
+            new = self._allocate(name, dtype, capacity)
+            new[:self.size] = old[:self.size]
+            if isinstance(new, np.memmap):
+                new.flush()
+                os.replace(new.filename, new.filename[:-len('.tmp')])
+            setattr(self, name, new)
+        self.capacity = capacity
+    
+    def append(self, server_idx: int, request_load: float):
+        if self.size == self.capacity:
+            self._grow(self.size + 1)
+        self.servers[self.size] = server_idx
+        self.loads[self.size] = request_load
+        self.size += 1
+    
+    def extend(self, indices: np.ndarray, loads: np.ndarray):
+        end = self.size + len(indices)
+        if end > self.capacity:
+            self._grow(end)
+        self.servers[self.size:end] = indices
+        self.loads[self.size:end] = loads
+        self.size = end
+    
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.servers[:self.size], self.loads[:self.size]
+    
+    def flush(self):
+        """Push spilled pages to disk"""
+        if self.spilled:
+            self.servers.flush()
+            self.loads.flush()
+    
+    def clear(self):
+        self.size = 0
+    
+    def __len__(self) -> int:
+        return self.size
+
+def make_history(history: Union[str, RequestHistory] = 'full') -> RequestHistory:
+    """Build a recorder from 'off', 'ring', 'full' or pass an instance through"""
+    if isinstance(history, RequestHistory):
+        return history
+    if history == 'off':
+        return NullHistory()
+    if history == 'ring':
+        return RingHistory()
+    if history == 'full':
+        return ColumnarHistory()
+    raise ValueError(f"Unknown history mode: {history}")
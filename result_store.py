@@ -0,0 +1,115 @@
+import numpy as np
+from typing import Dict, Iterable, List
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+
+KEY_DTYPE = '<U32'
+
+def code_version(*sources) -> str:
+    """Short hash of the source of the given modules, classes or functions"""
+    digest = hashlib.blake2b(digest_size=8)
+    for source in sources:
+        digest.update(inspect.getsource(source).encode())
+    return digest.hexdigest()
+
+def cell_key(**params) -> str:
+    """Content address of one experiment cell
+
+    The key is a hash of every parameter that determines the cell's result,
+    so callers pass the code version along with the workload parameters.
+    """
+    blob = json.dumps(params, sort_keys=True, default=lambda value: np.asarray(value).tolist())
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+class ResultStore:
+    """Append-only store of experiment cells in columnar .npz segments
+
+    A cell is a flat record of scalars (str, int, float) and 1-D arrays such
+    as per-server loads, addressed by cell_key. Each flush() writes the
+    pending cells as one new segment: one column per scalar field, and
+    concatenated values plus offsets per array field. Segments are never
+    rewritten; if a key appears in several, the newest one wins.
+    """
+
+    def __init__(self, path: str = 'results/store'):
+        self.path = path
+        self.segments = []
+        self.index = {}
+        self.pending = {}
+        for segment_path in sorted(glob.glob(os.path.join(path, '*.npz'))):
+            self._load_segment(segment_path)
+
+    def _load_segment(self, segment_path: str):
+        with np.load(segment_path) as data:
+            columns = {name: data[name] for name in data.files}
+        segment = len(self.segments)
+        self.segments.append(columns)
+        for row, key in enumerate(columns['key'].tolist()):
+            self.index[key] = (segment, row)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.pending or key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index.keys() | self.pending.keys())
+
+    def get(self, key: str) -> Dict:
+        """Return the record stored under key; array fields are NumPy views"""
+        if key in self.pending:
+            return dict(self.pending[key])
+        segment, row = self.index[key]
+        columns = self.segments[segment]
+        record = {}
+        for name, column in columns.items():
+            kind, _, field = name.partition(':')
+            if kind == 's':
+                record[field] = column[row].item()
+            elif kind == 'a':
+                offsets = columns['o:' + field]
+                record[field] = column[offsets[row]:offsets[row + 1]]
+        return record
+
+    def records(self, keys: Iterable[str]) -> List[Dict]:
+        return [self.get(key) for key in keys]
+
+    def put(self, key: str, record: Dict):
+        """Queue a record for the next flush(); lists and arrays become array fields"""
+        self.pending[key] = {
+            field: np.asarray(value) if isinstance(value, (list, tuple, np.ndarray)) else value
+            for field, value in record.items()
+        }
+
+    def flush(self):
+        """Write pending records as new segments, one per record layout"""
+        if not self.pending:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        layouts = {}
+        for key, record in self.pending.items():
+            layout = tuple((field, isinstance(value, np.ndarray)) for field, value in record.items())
+            layouts.setdefault(layout, []).append(key)
+
+        for number, (layout, keys) in enumerate(layouts.items()):
+            records = [self.pending[key] for key in keys]
+            columns = {'key': np.array(keys, dtype=KEY_DTYPE)}
+            for field, is_array in layout:
+                values = [record[field] for record in records]
+                if is_array:
+                    lengths = [len(value) for value in values]
+                    columns['a:' + field] = np.concatenate(values) if values else np.empty(0)
+                    columns['o:' + field] = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+                else:
+                    columns['s:' + field] = np.array(values)
+
+            # Written under a temporary name and renamed, so a crash never
+            # leaves a partial segment behind
+            segment_path = os.path.join(self.path, f"{time.time_ns():x}-{os.getpid()}-{number}.npz")
+            with open(segment_path + '.tmp', 'wb') as f:
+                np.savez(f, **columns)
+            os.replace(segment_path + '.tmp', segment_path)
+            self._load_segment(segment_path)
+        self.pending = {}
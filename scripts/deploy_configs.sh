@@ -10,4 +10,8 @@ fi
 scp ../configs/$1 ${USER}@${LOAD_BALANCER_IP}:/tmp/haproxy.cfg
 ssh ${USER}@${LOAD_BALANCER_IP} 'sudo mv /tmp/haproxy.cfg /etc/haproxy/haproxy.cfg && sudo systemctl restart haproxy'
 
+# Remembered so run_ab_and_save.sh and run_wrk_and_save.sh can name their output after it
+mkdir -p ../results
+echo "$1" > ../results/.haproxy_config
+
 echo "HAProxy config $1 deployed and restarted." 
\ No newline at end of file
@@ -14,6 +14,10 @@ scrape_configs:
         - '${BACKEND2_IP}:9100'
         - '${BACKEND3_IP}:9100'
         - '${CLIENT_IP}:9100'
+  - job_name: 'python_proxy'
+    static_configs:
+      - targets:
+        - '${LOAD_BALANCER_IP}:${PROXY_PORT:-8080}'
 EOL
 
 scp prometheus.yml ${USER}@${PROMETHEUS_HOST}:/opt/prometheus/prometheus.yml
@@ -1,16 +1,19 @@
 #!/bin/bash
 source ./common.env
 
-# $1: total_requests  $2: concurrency  $3: url
-if [ $# -ne 3 ]; then
-  echo "Usage: $0 <total_requests> <concurrency> <url>"
+# $1: total_requests  $2: concurrency  $3: url  [$4: config name, default: last deployed]
+if [ $# -lt 3 ] || [ $# -gt 4 ]; then
+  echo "Usage: $0 <total_requests> <concurrency> <url> [haproxy_cfg_file]"
   exit 1
 fi
 
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
 RESULTS_DIR="../results"
 mkdir -p $RESULTS_DIR
-OUTFILE="$RESULTS_DIR/ab_${1}n_${2}c_${TIMESTAMP}.txt"
+# The config name goes into the file name so benchmark_results.py can match it to an algorithm
+CONFIG=${4:-$(cat $RESULTS_DIR/.haproxy_config 2>/dev/null)}
+CONFIG=${CONFIG%.cfg}
+OUTFILE="$RESULTS_DIR/ab_${CONFIG:+${CONFIG}_}${1}n_${2}c_${TIMESTAMP}.txt"
 
 ssh ${USER}@${CLIENT_IP} "ab -n $1 -c $2 $3" | tee $OUTFILE
 
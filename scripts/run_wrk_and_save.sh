@@ -1,20 +1,23 @@
 #!/bin/bash
 source ./common.env
 
-# $1: concurrency  $2: duration  $3: url
-if [ $# -ne 3 ]; then
-  echo "Usage: $0 <concurrency> <duration> <url>"
+# $1: concurrency  $2: duration  $3: url  [$4: config name, default: last deployed]
+if [ $# -lt 3 ] || [ $# -gt 4 ]; then
+  echo "Usage: $0 <concurrency> <duration> <url> [haproxy_cfg_file]"
   exit 1
 fi
 
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
 RESULTS_DIR="../results"
 mkdir -p $RESULTS_DIR
-OUTFILE="$RESULTS_DIR/wrk_${1}c_${2}_${TIMESTAMP}.txt"
+# The config name goes into the file name so benchmark_results.py can match it to an algorithm
+CONFIG=${4:-$(cat $RESULTS_DIR/.haproxy_config 2>/dev/null)}
+CONFIG=${CONFIG%.cfg}
+OUTFILE="$RESULTS_DIR/wrk_${CONFIG:+${CONFIG}_}${1}c_${2}_${TIMESTAMP}.txt"
 
 url=$3
 [[ "${url}" != */ ]] && url="${url}/"
 
-ssh ${USER}@${CLIENT_IP} "wrk -t4 -c$1 -d$2 $url" | tee $OUTFILE
+ssh ${USER}@${CLIENT_IP} "wrk -t4 -c$1 -d$2 --latency $url" | tee $OUTFILE
 
 echo "wrk (long connection) output saved to $OUTFILE" 
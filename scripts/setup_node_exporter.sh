@@ -14,11 +14,14 @@ After=network.target
 
 [Service]
 User=node_exporter
-ExecStart=/usr/local/bin/node_exporter
+ExecStart=/usr/local/bin/node_exporter --collector.textfile.directory=/var/lib/node_exporter/textfile
 
 [Install]
 WantedBy=default.target
 EOL
+  # simulation.py --metrics-textfile writes balancer metrics here
+  sudo mkdir -p /var/lib/node_exporter/textfile
+  sudo chmod 1777 /var/lib/node_exporter/textfile
   sudo systemctl daemon-reload
   sudo systemctl enable node_exporter
   sudo systemctl start node_exporter
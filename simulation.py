@@ -1,69 +1,249 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from load_balancer import RoundRobinLoadBalancer, LeastConnectionLoadBalancer, WeightedRoundRobinLoadBalancer
+from load_balancer import (RoundRobinLoadBalancer, LeastConnectionLoadBalancer, WeightedRoundRobinLoadBalancer,
+                           PowerOfChoicesLoadBalancer, ConsistentHashLoadBalancer, FeedbackLoadBalancer)
+from feedback import DelayedFeedback
+from result_store import ResultStore, cell_key, code_version
+from instrumentation import capture, exposition, serve_metrics, write_textfile
+from running_stats import RunningStats
+from benchmark_results import benchmark_summary, load_benchmarks
+import load_balancer
+import load_index
+import request_history
 import time
-import pandas as pd
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterator, Iterable, List, Union
+import argparse
+import contextlib
+import csv
 import json
+import math
 import os
 import sys
 
-# Set matplotlib to use non-interactive backend to avoid popup windows
-plt.switch_backend('Agg')
+# pandas and matplotlib cost far more to import than a metrics-only run takes,
+# so they are imported on first use
+if TYPE_CHECKING:
+    import pandas as pd
+
+def load_pyplot():
+    """Import matplotlib.pyplot with the non-interactive backend"""
+    import matplotlib
+    # Non-interactive backend avoids popup windows
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
 def set_random_seed(seed: int = 42):
     """Set random seed for reproducibility"""
     np.random.seed(seed)
 
-def generate_requests(num_requests: int, distribution: str = 'lognormal', **kwargs) -> np.ndarray:
-    """Generate request loads with different distributions"""
+# Distributions compared in every experiment: display name -> (generator name, parameters)
+DISTRIBUTIONS = {
+    'Lognormal Distribution': ('lognormal', {'mean': 0.0, 'sigma': 0.5}),
+    'Exponential Distribution': ('exponential', {'scale': 1.0}),
+    'Uniform Distribution': ('uniform', {'low': 0.5, 'high': 1.5})
+}
+
+ALGORITHMS = ['Round Robin', 'Least Connection', 'Weighted Round Robin', 'Power of Two Choices', 'Consistent Hashing',
+              'Load Feedback']
+
+# Per-cell fields reported by analyze_results, and their column titles
+ANALYSIS_COLUMNS = {
+    'algorithm': 'Algorithm',
+    'distribution': 'Distribution',
+    'mean_load': 'Mean Load',
+    'std_load': 'Std Load',
+    'balance_score': 'Balance Score',
+    'requests_per_second': 'Requests/sec',
+    'execution_time': 'Execution Time'
+}
+
+# Per-cell metrics summarized across runs with confidence intervals, and their
+# column titles; fairness and load spread also decide when --adaptive stops
+SUMMARY_METRICS = {
+    'mean_load': 'Mean Load',
+    'balance_score': 'Balance Score',
+    'std_load': 'Std Load',
+    'requests_per_second': 'Requests/sec'
+}
+
+# One chart color per algorithm, in ALGORITHMS order
+COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#F7B731', '#A55EEA', '#26DE81']
+
+# WRR weights from the original three-server setup (configs/haproxy_wrr.cfg);
+# larger pools repeat the pattern
+DEFAULT_WRR_WEIGHTS = [3, 1, 2]
+
+def make_balancer(algorithm: str, num_servers: int, weights: List[float] = None, feedback=None, **kwargs):
+    """Build a load balancer by its display name
+
+    Load Feedback gets a DelayedFeedback over its own loads unless another
+    feedback source (such as a feedback.MetricsPoller) is passed in.
+    """
+    if algorithm == 'Round Robin':
+        return RoundRobinLoadBalancer(num_servers, **kwargs)
+    elif algorithm == 'Least Connection':
+        return LeastConnectionLoadBalancer(num_servers, **kwargs)
+    elif algorithm == 'Weighted Round Robin':
+        if weights is None:
+            weights = np.resize(DEFAULT_WRR_WEIGHTS, num_servers).tolist()
+        return WeightedRoundRobinLoadBalancer(num_servers, weights=weights, **kwargs)
+    elif algorithm == 'Power of Two Choices':
+        return PowerOfChoicesLoadBalancer(num_servers, choices=2, **kwargs)
+    elif algorithm == 'Consistent Hashing':
+        return ConsistentHashLoadBalancer(num_servers, **kwargs)
+    elif algorithm == 'Load Feedback':
+        return FeedbackLoadBalancer(num_servers, feedback=feedback if feedback is not None else DelayedFeedback(), **kwargs)
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+def request_seed(seed: int, run: int, dist_idx: int) -> np.random.SeedSequence:
+    """SeedSequence for one (run, distribution) request stream
+
+    The stream depends only on these indices, never on scheduling, so every
+    algorithm and server count in a run sees the same requests (common
+    random numbers) and results do not depend on the worker count or on
+    which cells were already cached.
+    """
+    return np.random.SeedSequence(seed, spawn_key=(run, dist_idx))
+
+def generate_requests(num_requests: int, distribution: str = 'lognormal', rng: np.random.Generator = None, **kwargs) -> np.ndarray:
+    """Generate request loads with different distributions
+
+    Draws from the global NumPy stream unless a Generator is passed in.
+    """
+    source = np.random if rng is None else rng
     if distribution == 'lognormal':
-        return np.random.lognormal(kwargs.get('mean', 0.0), kwargs.get('sigma', 0.5), num_requests)
+        return source.lognormal(kwargs.get('mean', 0.0), kwargs.get('sigma', 0.5), num_requests)
     elif distribution == 'exponential':
-        return np.random.exponential(kwargs.get('scale', 1.0), num_requests)
+        return source.exponential(kwargs.get('scale', 1.0), num_requests)
     elif distribution == 'uniform':
-        return np.random.uniform(kwargs.get('low', 0.5), kwargs.get('high', 1.5), num_requests)
+        return source.uniform(kwargs.get('low', 0.5), kwargs.get('high', 1.5), num_requests)
     else:
         raise ValueError(f"Unknown distribution: {distribution}")
 
-def run_simulation(balancer, requests: np.ndarray):
+def generate_request_chunks(num_requests: int, distribution: str = 'lognormal', rng: np.random.Generator = None,
+                            chunk_size: int = 1 << 20, **kwargs) -> Iterator[np.ndarray]:
+    """Yield request loads in fixed-size chunks so long runs use constant memory
+
+    Every sample consumes the bit generator in sequence, so the concatenated
+    chunks equal one generate_requests call with the same seed.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    for start in range(0, num_requests, chunk_size):
+        yield generate_requests(min(chunk_size, num_requests - start), distribution, rng=rng, **kwargs)
+
+def run_simulation(balancer, requests: Union[np.ndarray, Iterable[np.ndarray]]):
+    """Run one workload given as an array or sequence of loads, or as an iterable of chunks"""
     balancer.reset()
     start_time = time.time()
-    for request in requests:
-        balancer.assign_request(request)
+    if isinstance(requests, (list, tuple)) and (not requests or np.ndim(requests[0]) == 0):
+        # A plain sequence of loads is one batch, not a sequence of chunks
+        requests = np.asarray(requests, dtype=np.float64)
+    if isinstance(requests, np.ndarray):
+        balancer.assign_batch(requests)
+    else:
+        for chunk in requests:
+            balancer.assign_batch(chunk)
     end_time = time.time()
     metrics = balancer.get_load_metrics()
     metrics['execution_time'] = end_time - start_time
     return metrics, balancer.get_server_loads().copy()
 
-def plot_comparison_results(all_results: Dict[str, List[Dict]], save_path: str = None):
-    """Plot comparison results for all algorithms and distributions"""
-    # Prepare data for plotting
-    algorithms = list(all_results.keys())
-    distributions = ['Lognormal Distribution', 'Exponential Distribution', 'Uniform Distribution']
-    
-    # Calculate average metrics for each algorithm and distribution
-    comparison_data = []
-    for algo in algorithms:
-        for dist in distributions:
-            # Get all runs for this combination
-            runs = []
-            for result in all_results[algo]:
-                if dist in result:
-                    runs.append(result[dist])
-            
-            if runs:
-                # Calculate average metrics
-                avg_metrics = {
-                    'Algorithm': algo,
-                    'Distribution': dist,
-                    'Mean Load': np.mean([r['mean_load'] for r in runs]),
-                    'Std Load': np.mean([r['std_load'] for r in runs]),
-                    'Balance Score': np.mean([r['balance_score'] for r in runs]),
-                    'Requests/sec': np.mean([r['requests_per_second'] for r in runs]),
-                    'Execution Time': np.mean([r['execution_time'] for r in runs])
-                }
-                comparison_data.append(avg_metrics)
+def simulation_version() -> str:
+    """Code version recorded in cell keys: balancer code and request generation"""
+    return code_version(load_balancer, load_index, request_history, DelayedFeedback, request_seed, generate_requests,
+                        run_simulation)
+
+def simulation_cell_key(version: str, seed: int, run: int, distribution: str, algorithm: str,
+                        num_servers: int, num_requests: int, sample_every: int = 0, weights: List[float] = None,
+                        feedback: Dict = None) -> str:
+    """Store key of one (run, distribution, algorithm, server count) cell
+
+    Weights only enter the key for Weighted Round Robin and the
+    DelayedFeedback settings only for Load Feedback; None stands for the
+    make_balancer default.
+    """
+    return cell_key(version=version, seed=seed, run=run, distribution=DISTRIBUTIONS[distribution],
+                    algorithm=algorithm, num_servers=num_servers, num_requests=num_requests, sample_every=sample_every,
+                    weights=weights if algorithm == 'Weighted Round Robin' else None,
+                    feedback=feedback if algorithm == 'Load Feedback' else None)
+
+def cell_record(run: int, distribution: str, algorithm: str, num_servers: int, metrics: Dict, server_loads: np.ndarray) -> Dict:
+    """Flat record of one cell, as stored in the ResultStore"""
+    record = {'run': run, 'distribution': distribution, 'algorithm': algorithm, 'num_servers': num_servers}
+    record.update({key: float(value) for key, value in metrics.items()})
+    record['server_loads'] = server_loads
+    return record
+
+def cell_converged(stats: Dict[str, RunningStats], confidence: float, target_balance: float, target_std: float) -> bool:
+    """Whether a cell's fairness CI half-width is within target_balance and its
+    std load CI half-width within target_std times the mean server load
+
+    The std target scales with the mean load rather than with the std itself,
+    which is near zero for the best balancers.
+    """
+    return (stats['balance_score'].half_width(confidence) <= target_balance
+            and stats['std_load'].half_width(confidence) <= target_std * stats['mean_load'].mean)
+
+def summarize_cells(stats: Dict[tuple, Dict[str, RunningStats]], confidence: float,
+                    target_balance: float = None, target_std: float = None) -> List[Dict]:
+    """One row per (algorithm, distribution): runs, mean and CI half-width of
+    each SUMMARY_METRICS field, and whether the CI targets were met
+
+    Half-widths are None for cells with fewer than two runs; converged is
+    None when no targets are given (fixed-run mode).
+    """
+    summary = []
+    for (algorithm, distribution), cell_stats in stats.items():
+        row = {'algorithm': algorithm, 'distribution': distribution, 'runs': cell_stats['balance_score'].count}
+        for field, field_stats in cell_stats.items():
+            half_width = field_stats.half_width(confidence)
+            row[field] = field_stats.mean
+            row[field + '_ci'] = half_width if math.isfinite(half_width) else None
+        row['converged'] = (None if target_balance is None
+                            else cell_converged(cell_stats, confidence, target_balance, target_std))
+        summary.append(row)
+    return summary
+
+def write_summary(summary: List[Dict], csv_path: str, json_path: str, confidence: float):
+    """Write the per-cell summary as CSV and as JSON"""
+    columns = {'algorithm': 'Algorithm', 'distribution': 'Distribution', 'runs': 'Runs'}
+    for field, title in SUMMARY_METRICS.items():
+        columns.update({field: title, field + '_ci': f'{title} CI'})
+    columns['converged'] = 'Converged'
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns.values())
+        for row in summary:
+            writer.writerow('' if row[field] is None else row[field] for field in columns)
+    with open(json_path, 'w') as f:
+        json.dump({'confidence': confidence, 'cells': summary}, f, indent=4)
+
+def plot_comparison_results(results: 'pd.DataFrame', save_path: str = None, dpi: int = 300, summary: List[Dict] = None):
+    """Plot comparison results for all algorithms and distributions
+
+    `results` has one row per cell, as loaded from the ResultStore. With a
+    summarize_cells() summary, fairness and load spread get CI error bars
+    and the returned comparison data carries the half-widths and run counts.
+    """
+    import pandas as pd
+    plt = load_pyplot()
+    
+    # Average metrics over runs for each algorithm and distribution
+    comparison_data = (analyze_results(results)
+                       .groupby(['Algorithm', 'Distribution'], sort=False)
+                       .mean(numeric_only=True)
+                       .reset_index()
+                       .to_dict('records'))
+    intervals = {}
+    if summary:
+        intervals = {(row['algorithm'], row['distribution']): row for row in summary}
+        for row in comparison_data:
+            interval = intervals[(row['Algorithm'], row['Distribution'])]
+            row['Runs'] = interval['runs']
+            row['Balance Score CI'] = interval['balance_score_ci']
+            row['Std Load CI'] = interval['std_load_ci']
     
     # Create comparison charts
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
@@ -73,7 +253,10 @@ def plot_comparison_results(all_results: Dict[str, List[Dict]], save_path: str =
     ax1 = axes[0, 0]
     balance_data = pd.DataFrame(comparison_data)
     pivot_balance = balance_data.pivot(index='Distribution', columns='Algorithm', values='Balance Score')
-    pivot_balance.plot(kind='bar', ax=ax1, color=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+    balance_errors = None
+    if intervals:
+        balance_errors = balance_data.pivot(index='Distribution', columns='Algorithm', values='Balance Score CI').astype(float).fillna(0)
+    pivot_balance.plot(kind='bar', ax=ax1, color=COLORS[:len(pivot_balance.columns)], yerr=balance_errors, capsize=3)
     ax1.set_title('Jain\'s Fairness Index (Higher is Better)', pad=15)
     ax1.set_ylabel('Jain\'s Fairness Index')
     ax1.set_ylim(0, 1.05)
@@ -83,7 +266,10 @@ def plot_comparison_results(all_results: Dict[str, List[Dict]], save_path: str =
     # 2. Standard Deviation Comparison (Lower is Better)
     ax2 = axes[0, 1]
     pivot_std = balance_data.pivot(index='Distribution', columns='Algorithm', values='Std Load')
-    pivot_std.plot(kind='bar', ax=ax2, color=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+    std_errors = None
+    if intervals:
+        std_errors = balance_data.pivot(index='Distribution', columns='Algorithm', values='Std Load CI').astype(float).fillna(0)
+    pivot_std.plot(kind='bar', ax=ax2, color=COLORS[:len(pivot_std.columns)], yerr=std_errors, capsize=3)
     ax2.set_title('Load Standard Deviation (Lower is Better)', pad=15)
     ax2.set_ylabel('Standard Deviation')
     ax2.legend(title='Algorithm', loc='upper right')
@@ -92,7 +278,7 @@ def plot_comparison_results(all_results: Dict[str, List[Dict]], save_path: str =
     # 3. Throughput Comparison
     ax3 = axes[1, 0]
     pivot_throughput = balance_data.pivot(index='Distribution', columns='Algorithm', values='Requests/sec')
-    pivot_throughput.plot(kind='bar', ax=ax3, color=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+    pivot_throughput.plot(kind='bar', ax=ax3, color=COLORS[:len(pivot_throughput.columns)])
     ax3.set_title('Throughput (Requests per Second)', pad=15)
     ax3.set_ylabel('Requests/sec')
     ax3.legend(title='Algorithm', loc='upper right')
@@ -101,7 +287,7 @@ def plot_comparison_results(all_results: Dict[str, List[Dict]], save_path: str =
     # 4. Execution Time Comparison
     ax4 = axes[1, 1]
     pivot_time = balance_data.pivot(index='Distribution', columns='Algorithm', values='Execution Time')
-    pivot_time.plot(kind='bar', ax=ax4, color=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+    pivot_time.plot(kind='bar', ax=ax4, color=COLORS[:len(pivot_time.columns)])
     ax4.set_title('Execution Time (Lower is Better)', pad=15)
     ax4.set_ylabel('Time (seconds)')
     ax4.legend(title='Algorithm', loc='upper right')
@@ -110,24 +296,22 @@ def plot_comparison_results(all_results: Dict[str, List[Dict]], save_path: str =
     plt.tight_layout(pad=3.0)
     
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
         print(f"Comparison chart saved to: {save_path}")
     
     plt.close()  # Close the figure to free memory
     
     return comparison_data
 
-def plot_server_loads_comparison(all_results: Dict[str, List[Dict]], save_path: str = None):
+def plot_server_loads_comparison(results: 'pd.DataFrame', save_path: str = None, dpi: int = 300):
     """Plot server load distribution comparison"""
-    # Get the last run of each algorithm for visualization
+    plt = load_pyplot()
+    
+    # Get the last lognormal run of each algorithm for visualization
     server_loads_data = {}
-    for algo in all_results.keys():
-        if all_results[algo]:
-            # Get the last run with lognormal distribution and real server loads
-            for result in reversed(all_results[algo]):
-                if 'Lognormal Distribution' in result and 'server_loads' in result:
-                    server_loads_data[algo] = result['server_loads']
-                    break
+    lognormal = results[results['distribution'] == 'Lognormal Distribution']
+    for algo, cells in lognormal.groupby('algorithm', sort=False):
+        server_loads_data[algo] = cells['server_loads'].iloc[-1]
     
     if not server_loads_data:
         return
@@ -137,37 +321,30 @@ def plot_server_loads_comparison(all_results: Dict[str, List[Dict]], save_path:
     fig.suptitle('Server Load Distribution Comparison', fontsize=18, fontweight='bold', y=0.95)
     
     # Bar chart
-    x = np.arange(3)  # 3 servers
-    width = 0.25
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+    num_servers = len(next(iter(server_loads_data.values())))
+    x = np.arange(num_servers)
+    width = 0.8 / len(server_loads_data)
     
     for i, (algo, loads) in enumerate(server_loads_data.items()):
-        ax1.bar(x + i*width, loads, width, label=algo, alpha=0.8, color=colors[i])
+        ax1.bar(x + i*width, loads, width, label=algo, alpha=0.8, color=COLORS[i % len(COLORS)])
     
     ax1.set_xlabel('Server Index')
     ax1.set_ylabel('Load')
     ax1.set_title('Average Server Loads', pad=15)
-    ax1.set_xticks(x + width)
-    ax1.set_xticklabels(['Server 1', 'Server 2', 'Server 3'])
+    ax1.set_xticks(x + width * (len(server_loads_data) - 1) / 2)
+    ax1.set_xticklabels([f'Server {i + 1}' for i in range(num_servers)])
     ax1.legend(loc='upper right')
     
     # Jain's Fairness Index comparison
     algorithms = list(server_loads_data.keys())
-    # Calculate the average Jain's Fairness Index for each algorithm
-    fairness_scores = []
-    for algo in algorithms:
-        # Get all Jain's Fairness Index scores for all distributions and all runs
-        scores = []
-        for result in all_results[algo]:
-            for dist_metrics in result.values():
-                if isinstance(dist_metrics, dict) and 'balance_score' in dist_metrics:
-                    scores.append(dist_metrics['balance_score'])  # balance_score now contains Jain's Fairness Index
-        fairness_scores.append(np.mean(scores))
-    
-    bars = ax2.bar(algorithms, fairness_scores, color=['#FF6B6B', '#4ECDC4', '#45B7D1'], alpha=0.8)
+    # Average Jain's Fairness Index over all distributions and runs
+    fairness_scores = results.groupby('algorithm', sort=False)['balance_score'].mean()[algorithms].tolist()
+    
+    bars = ax2.bar(algorithms, fairness_scores, color=COLORS[:len(algorithms)], alpha=0.8)
     ax2.set_title('Jain\'s Fairness Index Comparison', pad=20)  # Add padding to title
     ax2.set_ylabel('Jain\'s Fairness Index')
     ax2.set_ylim(0, 1.1)  # Increase y-axis limit to make room for labels
+    ax2.tick_params(axis='x', rotation=30)
     
     # Add value labels on bars with better positioning
     for bar, score in zip(bars, fairness_scores):
@@ -183,31 +360,80 @@ def plot_server_loads_comparison(all_results: Dict[str, List[Dict]], save_path:
     plt.tight_layout(pad=2.0)  # Add more padding around subplots
     
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
         print(f"Server loads comparison saved to: {save_path}")
     
     plt.close()
 
-def analyze_results(all_results: Dict[str, List[Dict]]) -> pd.DataFrame:
-    """Analyze and compare results from different algorithms"""
-    analysis_data = []
-    valid_distributions = ['Lognormal Distribution', 'Exponential Distribution', 'Uniform Distribution']
-    for balancer_name, results in all_results.items():
-        for result in results:
-            for dist_name, metrics in result.items():
-                if dist_name not in valid_distributions:
-                    continue  # Skip non-distribution items like server_loads
-                analysis_data.append({
-                    'Algorithm': balancer_name,
-                    'Distribution': dist_name,
-                    'Mean Load': metrics['mean_load'],
-                    'Std Load': metrics['std_load'],
-                    'Balance Score': metrics['balance_score'],
-                    'Requests/sec': metrics['requests_per_second'],
-                    'Execution Time': metrics['execution_time']
-                })
-    df = pd.DataFrame(analysis_data)
-    return df
+def plot_fairness_convergence(convergence: Dict[str, Dict[str, np.ndarray]], save_path: str = None, dpi: int = 300):
+    """Plot Jain's Fairness Index and max/mean imbalance over the course of a run"""
+    distributions = list(convergence.keys())
+    if not distributions:
+        return
+    plt = load_pyplot()
+    
+    fig, axes = plt.subplots(2, len(distributions), figsize=(6 * len(distributions), 10), squeeze=False)
+    fig.suptitle('Fairness Convergence Over Time', fontsize=18, fontweight='bold', y=0.98)
+    for col, dist_name in enumerate(distributions):
+        ax_fair = axes[0, col]
+        ax_imb = axes[1, col]
+        for i, (algo, samples) in enumerate(convergence[dist_name].items()):
+            color = COLORS[i % len(COLORS)]
+            ax_fair.plot(samples['requests'], samples['balance_score'], label=algo, color=color)
+            ax_imb.plot(samples['requests'], samples['imbalance'], label=algo, color=color)
+        ax_fair.set_title(dist_name, pad=15)
+        ax_fair.set_ylabel('Jain\'s Fairness Index')
+        ax_fair.legend(title='Algorithm', loc='lower right')
+        ax_imb.set_xlabel('Requests')
+        ax_imb.set_ylabel('Max / Mean Load')
+        ax_imb.legend(title='Algorithm', loc='upper right')
+    
+    plt.tight_layout(pad=3.0)
+    
+    if save_path:
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight', facecolor='white', edgecolor='none')
+        print(f"Fairness convergence chart saved to: {save_path}")
+    
+    plt.close()
+
+def analyze_results(results: 'pd.DataFrame', benchmarks: 'pd.DataFrame' = None) -> 'pd.DataFrame':
+    """Analyze and compare results from different algorithms
+
+    With a benchmark_results.load_benchmarks() table, each row also gets the
+    mean throughput, latency and failure rate measured on HAProxy with the
+    same algorithm (NaN for algorithms without measurements).
+    """
+    analysis = results[list(ANALYSIS_COLUMNS)].rename(columns=ANALYSIS_COLUMNS).reset_index(drop=True)
+    if benchmarks is not None:
+        analysis = analysis.merge(benchmark_summary(benchmarks), on='Algorithm', how='left')
+    return analysis
+
+def write_analysis_csv(records: List[Dict], path: str):
+    """Write the analyze_results table straight from store records, without pandas"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(ANALYSIS_COLUMNS.values())
+        for record in records:
+            writer.writerow(record[field] for field in ANALYSIS_COLUMNS)
+
+def format_interval(mean: float, half_width: float, digits: int) -> str:
+    """mean ± half-width; n/a when the half-width is missing (None or NaN)"""
+    if half_width is None or math.isnan(half_width):
+        return f"{mean:.{digits}f} ± n/a"
+    return f"{mean:.{digits}f} ± {half_width:.{digits}f}"
+
+def print_metrics_table(summary: List[Dict]):
+    """Print mean fairness, load spread and throughput with CI half-widths per algorithm and distribution"""
+    print(f"{'algorithm':<24} {'distribution':<26} {'runs':>5} {'jain':>17} {'std load':>15} {'req/s':>10}")
+    print("-" * 102)
+    for row in summary:
+        balance = format_interval(row['balance_score'], row['balance_score_ci'], 4)
+        std_load = format_interval(row['std_load'], row['std_load_ci'], 2)
+        flag = ' *' if row['converged'] is False else ''
+        print(f"{row['algorithm']:<24} {row['distribution']:<26} {row['runs']:>5} {balance:>17} {std_load:>15} "
+              f"{row['requests_per_second']:>10.0f}{flag}")
+    if any(row['converged'] is False for row in summary):
+        print("* confidence intervals wider than the targets")
 
 def save_results(results: Dict, filename: str):
     """Save simulation results to file"""
@@ -217,6 +443,8 @@ def save_results(results: Dict, filename: str):
 
 def print_summary_report(comparison_data: List[Dict]):
     """Print a human-readable summary report"""
+    import pandas as pd
+    
     print("\n" + "="*80)
     print("LOAD BALANCING ALGORITHM PERFORMANCE SUMMARY")
     print("="*80)
@@ -265,6 +493,11 @@ def print_summary_report(comparison_data: List[Dict]):
         print(f"  • Average Load Std Dev: {algo_data['Std Load'].mean():.3f}")
         print(f"  • Average Throughput: {algo_data['Requests/sec'].mean():.0f} req/s")
         print(f"  • Average Execution Time: {algo_data['Execution Time'].mean():.4f}s")
+        if 'Balance Score CI' in algo_data:
+            for row in algo_data.to_dict('records'):
+                balance = format_interval(row['Balance Score'], row['Balance Score CI'], 4)
+                std_load = format_interval(row['Std Load'], row['Std Load CI'], 2)
+                print(f"    – {row['Distribution']}: Jain {balance}, std load {std_load} ({row['Runs']} runs)")
     
     print("\n" + "="*80)
     sys.stdout.flush()  # Force flush
@@ -284,81 +517,261 @@ def explain_jain_fairness_index():
     print("  • For 3 servers: range is [0.33, 1.0]")
     print("-" * 50)
 
-def main():
+# Short names accepted on the command line and in config files
+DISTRIBUTION_NAMES = {dist: name for name, (dist, _) in DISTRIBUTIONS.items()}
+
+def load_config(path: str) -> Dict:
+    """Read simulation settings from a JSON or TOML file; keys match the long flag names"""
+    with open(path, 'rb') as f:
+        if path.endswith('.toml'):
+            import tomllib
+            config = tomllib.load(f)
+        else:
+            config = json.load(f)
+    return {key.replace('-', '_'): value for key, value in config.items()}
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse flags on top of an optional --config file; flags win"""
+    parser = argparse.ArgumentParser(description='Compare load balancing algorithms on simulated workloads')
+    parser.add_argument('--config', help='JSON or TOML file with any of the options below')
+    parser.add_argument('--servers', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=12000)
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Generate and route requests in chunks of this size, so memory stays bounded at any --requests')
+    parser.add_argument('--runs', type=int, default=5, help='Repetitions per cell (without --adaptive)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Repeat each cell until its confidence intervals meet the targets below, or a budget runs out')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the reported intervals')
+    parser.add_argument('--target-balance', type=float, default=0.001,
+                        help="Target CI half-width of Jain's fairness index (absolute)")
+    parser.add_argument('--target-std', type=float, default=0.002,
+                        help='Target CI half-width of the load standard deviation, relative to the mean server load')
+    parser.add_argument('--min-runs', type=int, default=3, help='Runs per cell before --adaptive may stop it')
+    parser.add_argument('--max-runs', type=int, default=100, help='Run budget per cell with --adaptive')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='Wall-clock budget in seconds with --adaptive; no new run starts once it is spent')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--weights', type=float, nargs='+', default=None,
+                        help=f'Weighted Round Robin weights (default: {DEFAULT_WRR_WEIGHTS} repeated to fill the pool)')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--distributions', nargs='+', default=list(DISTRIBUTION_NAMES), choices=list(DISTRIBUTION_NAMES))
+    parser.add_argument('--output-dir', default='results')
+    parser.add_argument('--store', default=None, help='Result store directory (default: <output-dir>/store)')
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution of the PNG charts')
+    parser.add_argument('--metrics-only', action='store_true',
+                        help='Skip charts and the pandas report; only write the CSV and print a metrics table')
+    parser.add_argument('--metrics-textfile', default=None,
+                        help='Instrument the balancers and write Prometheus metrics here after every run (node_exporter textfile collector)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Instrument the balancers and serve Prometheus metrics on this port while simulating')
+    parser.add_argument('--scrape-every', type=int, default=100,
+                        help='Load Feedback: requests between simulated metric scrapes')
+    parser.add_argument('--feedback-delay', type=int, default=0,
+                        help='Load Feedback: requests before a scrape reaches the balancer (metric lag)')
+    parser.add_argument('--benchmarks', default=None,
+                        help='Directory of ab/wrk reports (scripts/run_*_and_save.sh) to compare with the simulation')
+    parser.add_argument('--profile', default=None, help='Write cProfile and tracemalloc captures for every run into this directory')
+    
+    args, _ = parser.parse_known_args(argv)
+    if args.config:
+        config = load_config(args.config)
+        unknown = set(config) - set(vars(args))
+        if unknown:
+            parser.error(f"Unknown option(s) in {args.config}: {', '.join(sorted(unknown))}")
+        parser.set_defaults(**config)
+    args = parser.parse_args(argv)
+    # argparse does not check config-supplied defaults against choices
+    for option, choices in (('algorithms', ALGORITHMS), ('distributions', DISTRIBUTION_NAMES)):
+        invalid = set(getattr(args, option)) - set(choices)
+        if invalid:
+            parser.error(f"Invalid {option}: {', '.join(sorted(invalid))}")
+    if args.weights is not None and len(args.weights) != args.servers:
+        parser.error("--weights needs one weight per server")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    if args.scrape_every < 1 or args.feedback_delay < 0:
+        parser.error("--scrape-every must be positive and --feedback-delay non-negative")
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+    if args.adaptive and not 2 <= args.min_runs <= args.max_runs:
+        parser.error("--adaptive needs 2 <= --min-runs <= --max-runs")
+    return args
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+    
     # Set random seed for reproducibility
-    set_random_seed(42)
+    seed = args.seed
+    set_random_seed(seed)
     
     # Simulation parameters
-    num_servers = 3
-    num_requests = 12000
-    num_runs = 5  # Run multiple times to ensure reliability
+    num_servers = args.servers
+    num_requests = args.requests
+    # Run multiple times to ensure reliability; --adaptive keeps going per cell
+    # until the confidence intervals are narrow enough
+    min_runs, max_runs = (args.min_runs, args.max_runs) if args.adaptive else (args.runs, args.runs)
+    distributions = {DISTRIBUTION_NAMES[dist]: DISTRIBUTIONS[DISTRIBUTION_NAMES[dist]] for dist in args.distributions}
     
     # Create results directory
-    os.makedirs('results', exist_ok=True)
-    
-    # Generate requests with different distributions
-    distributions = {
-        'Lognormal Distribution': lambda: generate_requests(num_requests, 'lognormal', mean=0.0, sigma=0.5),
-        'Exponential Distribution': lambda: generate_requests(num_requests, 'exponential', scale=1.0),
-        'Uniform Distribution': lambda: generate_requests(num_requests, 'uniform', low=0.5, high=1.5)
-    }
-    
-    # Initialize load balancers
-    balancers = {
-        'Round Robin': RoundRobinLoadBalancer(num_servers),
-        'Least Connection': LeastConnectionLoadBalancer(num_servers),
-        'Weighted Round Robin': WeightedRoundRobinLoadBalancer(num_servers, weights=[3, 1, 2])
-    }
-    
-    # Store all results
-    all_results = {name: [] for name in balancers.keys()}
+    output_dir = args.output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Finished cells are loaded from the store instead of re-simulated.
+    # Instrumented or profiled runs bypass it: their timings include the
+    # overhead, and cached cells would never reach the instrumentation
+    store = ResultStore(args.store or os.path.join(output_dir, 'store'))
+    use_store = not (args.profile or args.metrics_textfile or args.metrics_port)
+    version = simulation_version()
+    
+    # Initialize load balancers (per-request history is never read here)
+    feedback = {'scrape_every': args.scrape_every, 'delay': args.feedback_delay}
+    balancers = {name: make_balancer(name, num_servers, weights=args.weights, history='off',
+                                     feedback=DelayedFeedback(**feedback) if name == 'Load Feedback' else None)
+                 for name in args.algorithms}
+    
+    # Sample fairness 200 times per run to chart convergence
+    sample_every = max(num_requests // 200, 1)
+    for balancer in balancers.values():
+        balancer.enable_sampling(every=sample_every, capacity=200)
+    
+    # Optional Prometheus instrumentation; off, the balancers run unwrapped
+    metrics_server = None
+    if args.metrics_textfile or args.metrics_port:
+        for balancer in balancers.values():
+            balancer.enable_instrumentation()
+        if args.metrics_port:
+            metrics_server = serve_metrics(lambda: exposition(balancers), args.metrics_port)
+            print(f"📡 Prometheus metrics on :{args.metrics_port}/metrics")
     
     print("🚀 Starting Load Balancing Simulation...")
     print(f"📊 Testing {len(balancers)} algorithms with {len(distributions)} distributions")
-    print(f"🔄 Running {num_runs} iterations for reliability")
+    if args.adaptive:
+        print(f"🔄 Running {min_runs}-{max_runs} iterations per cell, until the {args.confidence:.0%} CIs "
+              f"are within ±{args.target_balance} Jain and ±{args.target_std:.1%} of mean load on std load")
+    else:
+        print(f"🔄 Running {max_runs} iterations for reliability")
+    print(f"💾 {len(store)} cells in the result store" + ("" if use_store else " (not used while instrumented or profiled)"))
     print("-" * 60)
     sys.stdout.flush()
     
-    # Run simulations multiple times
-    for run in range(num_runs):
-        print(f"\n🔄 Run {run + 1}/{num_runs}")
+    # Run simulations multiple times, streaming each cell's metrics into
+    # running statistics; a cell leaves `active` once its CIs meet the targets
+    stats = {(name, dist_name): {field: RunningStats() for field in SUMMARY_METRICS}
+             for dist_name in distributions for name in balancers}
+    active = list(stats)
+    deadline = time.time() + args.budget if args.adaptive and args.budget else math.inf
+    records = []
+    computed = 0
+    run = 0
+    while active and run < max_runs and (run < min_runs or time.time() < deadline):
+        print(f"\n🔄 Run {run + 1}/{max_runs}" + (f" ({len(active)} cells left)" if args.adaptive else ""))
+        profiling = capture(os.path.join(args.profile, f'run{run}')) if args.profile else contextlib.nullcontext()
+        
+        with profiling:
+            for dist_name, (dist, params) in distributions.items():
+                dist_idx = list(DISTRIBUTIONS).index(dist_name)
+                requests = None
+                
+                for balancer_name, balancer in balancers.items():
+                    cell = (balancer_name, dist_name)
+                    if cell not in active:
+                        continue
+                    key = simulation_cell_key(version, seed, run, dist_name, balancer_name, num_servers, num_requests,
+                                              sample_every, args.weights, feedback)
+                    if use_store and key in store:
+                        print(f"  Cached  {balancer_name} with {dist_name}")
+                        record = store.get(key)
+                    else:
+                        if args.chunk_size:
+                            # Streamed: each balancer regenerates the same chunks instead of sharing one array
+                            rng = np.random.default_rng(request_seed(seed, run, dist_idx))
+                            requests = generate_request_chunks(num_requests, dist, rng=rng, chunk_size=args.chunk_size,
+                                                               **params)
+                        elif requests is None:
+                            rng = np.random.default_rng(request_seed(seed, run, dist_idx))
+                            requests = generate_requests(num_requests, dist, rng=rng, **params)
+                        print(f"  Testing {balancer_name} with {dist_name}")
+                        metrics, server_loads = run_simulation(balancer, requests)
+                        record = cell_record(run, dist_name, balancer_name, num_servers, metrics, server_loads)
+                        samples = balancer.get_samples()
+                        record.update({f'samples_{field}': samples[field] for field in samples.dtype.names})
+                        if use_store:
+                            store.put(key, record)
+                        computed += 1
+                    records.append(record)
+                    
+                    for field, field_stats in stats[cell].items():
+                        field_stats.update(record[field])
         
-        for dist_name, request_generator in distributions.items():
-            requests = request_generator()
-            
-            for balancer_name, balancer in balancers.items():
-                print(f"  Testing {balancer_name} with {dist_name}")
-                metrics, server_loads = run_simulation(balancer, requests)
-                all_results[balancer_name].append({
-                    dist_name: metrics,
-                    'server_loads': server_loads.tolist()
-                })
+        run += 1
+        if args.adaptive and run >= min_runs:
+            active = [cell for cell in active
+                      if not cell_converged(stats[cell], args.confidence, args.target_balance, args.target_std)]
+        if args.metrics_textfile:
+            write_textfile(args.metrics_textfile, exposition(balancers))
+    
+    store.flush()
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    print(f"\n💾 Simulated {computed} cells, loaded {len(records) - computed} from the store")
+    write_analysis_csv(records, os.path.join(output_dir, 'analysis_results.csv'))
+    # Convergence is only judged against targets the user asked for
+    targets = (args.target_balance, args.target_std) if args.adaptive else (None, None)
+    summary = summarize_cells(stats, args.confidence, *targets)
+    write_summary(summary, os.path.join(output_dir, 'summary_results.csv'), os.path.join(output_dir, 'summary_results.json'),
+                  args.confidence)
+    if args.benchmarks:
+        import pandas as pd
+        comparison = (analyze_results(pd.DataFrame(records), load_benchmarks(args.benchmarks))
+                      .groupby(['Algorithm', 'Distribution'], sort=False)
+                      .mean(numeric_only=True)
+                      .reset_index())
+        comparison.to_csv(os.path.join(output_dir, 'benchmark_comparison.csv'), index=False)
+        print(f"📄 Simulated vs measured metrics saved to {os.path.join(output_dir, 'benchmark_comparison.csv')}")
+    if args.adaptive and active:
+        print(f"⚠️  Budget spent before {len(active)} cell(s) met the CI targets (Converged is False in summary_results.csv)")
+    
+    if args.metrics_only:
+        print()
+        print_metrics_table(summary)
+        print(f"\n✅ Simulation completed! Metrics saved to {os.path.join(output_dir, 'analysis_results.csv')} "
+              f"and {os.path.join(output_dir, 'summary_results.csv')}")
+        sys.stdout.flush()
+        return
+    
+    import pandas as pd
+    results = pd.DataFrame(records)
+    
+    # Fairness over the first run, per distribution and algorithm
+    convergence = {dist_name: {} for dist_name in distributions}
+    for cell in results[results['run'] == 0].itertuples():
+        convergence[cell.distribution][cell.algorithm] = {
+            'requests': cell.samples_requests,
+            'balance_score': cell.samples_balance_score,
+            'imbalance': cell.samples_imbalance
+        }
     
     print("\n📈 Generating comparison charts and reports...")
     sys.stdout.flush()
     
     # Generate comparison charts
-    comparison_data = plot_comparison_results(all_results, 'results/algorithm_comparison.png')
-    plot_server_loads_comparison(all_results, 'results/server_loads_comparison.png')
-    
-    # Analyze and save overall results
-    analysis_df = analyze_results(all_results)
-    analysis_df.to_csv('results/analysis_results.csv', index=False)
+    comparison_data = plot_comparison_results(results, os.path.join(output_dir, 'algorithm_comparison.png'), args.dpi, summary)
+    plot_server_loads_comparison(results, os.path.join(output_dir, 'server_loads_comparison.png'), args.dpi)
+    plot_fairness_convergence(convergence, os.path.join(output_dir, 'fairness_convergence.png'), args.dpi)
     
     # Print summary report
     print_summary_report(comparison_data)
     explain_jain_fairness_index()
     
-    # Save detailed results
-    save_results(all_results, 'detailed_results')
-    
     print("\n✅ Simulation completed!")
-    print("📁 Results saved in 'results/' directory:")
+    print(f"📁 Results saved in '{output_dir}/' directory:")
     print("   • algorithm_comparison.png - Main comparison chart")
     print("   • server_loads_comparison.png - Server load distribution")
+    print("   • fairness_convergence.png - Fairness over the first run")
     print("   • analysis_results.csv - Detailed data")
-    print("   • detailed_results.json - Raw simulation data")
+    print(f"   • summary_results.csv/.json - Per-cell means with {args.confidence:.0%} confidence intervals")
+    print("   • store/ - Per-cell results, reused by later runs")
     sys.stdout.flush()  # Final flush
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
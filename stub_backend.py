@@ -0,0 +1,82 @@
+import numpy as np
+from typing import List
+import argparse
+import asyncio
+import sys
+
+class StubBackend:
+    """Minimal keep-alive HTTP/1.1 server standing in for an nginx backend
+
+    Each response waits a service time drawn from a lognormal distribution
+    (median `delay` seconds, spread `sigma`; delay=0 answers immediately)
+    and returns a fixed-size body, so a single box can host a whole backend
+    pool for proxy and load generator runs.
+    """
+    
+    def __init__(self, name: str, delay: float = 0.0, sigma: float = 0.5, body_size: int = 612, seed: int = None):
+        self.name = name
+        self.delay = delay
+        self.sigma = sigma
+        self.body = b'x' * body_size
+        self.rng = np.random.default_rng(seed)
+        self.requests = 0
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length:
+                    await reader.readexactly(length)
+                
+                if self.delay > 0:
+                    await asyncio.sleep(self.delay * float(self.rng.lognormal(0.0, self.sigma)))
+                self.requests += 1
+                close = headers.get('connection', '').lower() == 'close' or lines[0].endswith('HTTP/1.0')
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\n'
+                    b'Content-Type: text/plain\r\n'
+                    + f'Content-Length: {len(self.body)}\r\nX-Backend: {self.name}\r\n'.encode()
+                    + (b'Connection: close\r\n' if close else b'')
+                    # A HEAD response carries the headers of a GET but no body
+                    + b'\r\n' + (b'' if lines[0].startswith('HEAD ') else self.body)
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(ports: List[int], host: str = '127.0.0.1', **kwargs):
+    """Run one StubBackend per port until cancelled"""
+    servers = []
+    for i, port in enumerate(ports):
+        backend = StubBackend(f'backend{i + 1}', seed=port, **kwargs)
+        servers.append(await asyncio.start_server(backend.handle, host, port, backlog=1024))
+        print(f"🟢 backend{i + 1} listening on {host}:{port}")
+    sys.stdout.flush()
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stub HTTP backends for proxy and load generator tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--ports', type=int, nargs='+', default=[8081, 8082, 8083])
+    parser.add_argument('--delay', type=float, default=0.005, help='Median service time in seconds')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Lognormal spread of the service time')
+    parser.add_argument('--body-size', type=int, default=612)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.ports, args.host, delay=args.delay, sigma=args.sigma, body_size=args.body_size))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
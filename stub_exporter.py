@@ -0,0 +1,70 @@
+from instrumentation import serve_metrics
+import argparse
+import math
+import sys
+import time
+
+class StubExporter:
+    """Fake node_exporter and nginx-prometheus-exporter for one backend
+
+    Reports a utilization that drifts around `utilization` by `amplitude`
+    with the given period (seconds): as node_cpu_seconds_total counters whose
+    busy share follows it, and as nginx_connections_active out of `capacity`
+    connections. Lets feedback.MetricsPoller and the Load Feedback balancer
+    run offline.
+    """
+    
+    def __init__(self, utilization: float, amplitude: float = 0.0, period: float = 60.0, cores: int = 2, capacity: int = 256):
+        self.utilization = utilization
+        self.amplitude = amplitude
+        self.period = period
+        self.cores = cores
+        self.capacity = capacity
+        self.start_time = time.monotonic()
+    
+    def current_utilization(self, elapsed: float) -> float:
+        value = self.utilization + self.amplitude * math.sin(2 * math.pi * elapsed / self.period)
+        return min(max(value, 0.0), 1.0)
+    
+    def render(self) -> str:
+        elapsed = time.monotonic() - self.start_time
+        # Idle seconds integrate (1 - utilization) over time, per core
+        omega = 2 * math.pi / self.period
+        busy = self.utilization * elapsed + self.amplitude * (1 - math.cos(omega * elapsed)) / omega
+        busy = min(max(busy, 0.0), elapsed)
+        lines = ['# HELP node_cpu_seconds_total Seconds the CPUs spent in each mode.', '# TYPE node_cpu_seconds_total counter']
+        for cpu in range(self.cores):
+            lines.append(f'node_cpu_seconds_total{{cpu="{cpu}",mode="idle"}} {elapsed - busy!r}')
+            lines.append(f'node_cpu_seconds_total{{cpu="{cpu}",mode="user"}} {busy!r}')
+        lines += ['# HELP nginx_connections_active Active client connections', '# TYPE nginx_connections_active gauge',
+                  f'nginx_connections_active {round(self.current_utilization(elapsed) * self.capacity)}']
+        return '\n'.join(lines) + '\n'
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub Prometheus exporters reporting synthetic backend utilization')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--ports', type=int, nargs='+', default=[9101, 9102, 9103])
+    parser.add_argument('--utilizations', type=float, nargs='+', default=[0.2, 0.5, 0.8],
+                        help='Mean utilization per exporter, in --ports order')
+    parser.add_argument('--amplitude', type=float, default=0.0, help='Sinusoidal drift around each mean')
+    parser.add_argument('--period', type=float, default=60.0, help='Drift period in seconds')
+    parser.add_argument('--capacity', type=int, default=256, help='Connections at full utilization')
+    args = parser.parse_args()
+    if len(args.utilizations) != len(args.ports):
+        parser.error("--utilizations needs one value per port")
+    
+    servers = []
+    for port, utilization in zip(args.ports, args.utilizations):
+        exporter = StubExporter(utilization, args.amplitude, args.period, capacity=args.capacity)
+        servers.append(serve_metrics(exporter.render, port, args.host))
+        print(f"🟢 exporter at {utilization:.0%} utilization on http://{args.host}:{port}/metrics")
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
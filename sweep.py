@@ -0,0 +1,111 @@
+import numpy as np
+from simulation import (DISTRIBUTIONS, ALGORITHMS, make_balancer, generate_requests, run_simulation, save_results,
+                        request_seed, simulation_version, simulation_cell_key, cell_record)
+from result_store import ResultStore
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Tuple
+import argparse
+import itertools
+import os
+import sys
+import time
+
+# Shared memory blocks a worker process has attached to, by block name
+_attached = {}
+
+def publish_requests(seed: int, num_runs: int, num_requests: int, distributions: List[str],
+                     needed: Set[Tuple[int, str]] = None) -> Dict[Tuple[int, str], shared_memory.SharedMemory]:
+    """Generate every request array once into its own shared memory block
+
+    With `needed` set, only those (run, distribution) streams are generated.
+    """
+    blocks = {}
+    for run, dist_name in itertools.product(range(num_runs), distributions):
+        if needed is not None and (run, dist_name) not in needed:
+            continue
+        # Seeded by the position in DISTRIBUTIONS, not in `distributions`, so
+        # a subset gets the same streams as the full sweep and simulation.py
+        dist_idx = list(DISTRIBUTIONS).index(dist_name)
+        dist, params = DISTRIBUTIONS[dist_name]
+        rng = np.random.default_rng(request_seed(seed, run, dist_idx))
+        requests = generate_requests(num_requests, dist, rng=rng, **params)
+        block = shared_memory.SharedMemory(create=True, size=max(requests.nbytes, 1))
+        np.ndarray(requests.shape, dtype=requests.dtype, buffer=block.buf)[:] = requests
+        blocks[(run, dist_name)] = block
+    return blocks
+
+def _attach(name: str, num_requests: int) -> np.ndarray:
+    if name not in _attached:
+        # Workers share the parent's resource tracker, so attaching here does
+        # not add a second owner; the parent unlinks every block at the end
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray((num_requests,), dtype=np.float64, buffer=_attached[name].buf)
+
+def run_cell(cell: Tuple[int, str, str, int], block_name: str, num_requests: int) -> Dict:
+    """Simulate one (run, distribution, algorithm, server_count) cell"""
+    run, dist_name, algorithm, num_servers = cell
+    requests = _attach(block_name, num_requests)
+    balancer = make_balancer(algorithm, num_servers, history='off')
+    metrics, server_loads = run_simulation(balancer, requests)
+    return cell_record(run, dist_name, algorithm, num_servers, metrics, server_loads)
+
+def run_sweep(num_runs: int, num_requests: int, server_counts: List[int], algorithms: List[str] = None,
+              distributions: List[str] = None, seed: int = 42, workers: int = None, store: ResultStore = None) -> List[Dict]:
+    """Run every cell over a process pool and return records in cell order
+
+    Requests travel to workers as shared memory block names, not pickled
+    arrays. Balance metrics are bit-identical for any worker count; only the
+    timing fields vary between runs. With a store, cells it already holds
+    are loaded instead of simulated and new cells are added to it.
+    """
+    algorithms = algorithms or ALGORITHMS
+    distributions = distributions or list(DISTRIBUTIONS)
+    cells = list(itertools.product(range(num_runs), distributions, algorithms, server_counts))
+    store = store if store is not None else ResultStore()
+    version = simulation_version()
+    keys = [simulation_cell_key(version, seed, run, dist_name, algorithm, num_servers, num_requests)
+            for run, dist_name, algorithm, num_servers in cells]
+    missing = [(cell, key) for cell, key in zip(cells, keys) if key not in store]
+    print(f"  {len(cells) - len(missing)}/{len(cells)} cells loaded from the store")
+    sys.stdout.flush()
+    
+    blocks = publish_requests(seed, num_runs, num_requests, distributions, needed={cell[:2] for cell, _ in missing})
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_cell, cell, blocks[cell[:2]].name, num_requests) for cell, _ in missing]
+            for i, ((_, key), future) in enumerate(zip(missing, futures), 1):
+                store.put(key, future.result())
+                if i % max(len(missing) // 20, 1) == 0 or i == len(missing):
+                    print(f"  {i}/{len(missing)} cells done")
+                    sys.stdout.flush()
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+        store.flush()
+    return store.records(keys)
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel, deterministic sweep over runs x distributions x algorithms x server counts')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=12000)
+    parser.add_argument('--server-counts', type=int, nargs='+', default=[3])
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--output', default='sweep_results', help='Name of the JSON file written to results/')
+    args = parser.parse_args()
+    
+    cells = args.runs * len(DISTRIBUTIONS) * len(args.algorithms) * len(args.server_counts)
+    print(f"🚀 Sweeping {cells} cells on {args.workers or os.cpu_count()} workers")
+    sys.stdout.flush()
+    start_time = time.time()
+    records = run_sweep(args.runs, args.requests, args.server_counts, args.algorithms, seed=args.seed, workers=args.workers)
+    for record in records:
+        record['server_loads'] = record['server_loads'].tolist()
+    save_results(records, args.output)
+    print(f"✅ Sweep finished in {time.time() - start_time:.1f}s, results saved to results/{args.output}.json")
+
+if __name__ == "__main__":
+    main()
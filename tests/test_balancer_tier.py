@@ -0,0 +1,18 @@
+import numpy as np
+from balancer_tier import run_tier
+from simulation import DISTRIBUTIONS, generate_requests, make_balancer, request_seed, run_simulation
+from sweep import publish_requests
+
+def test_single_balancer_tier_matches_simulation_stream():
+    dist_name = 'Exponential Distribution'
+    block = publish_requests(42, 1, 5000, [dist_name])[(0, dist_name)]
+    try:
+        record = run_tier('Least Connection', 3, block.name, 5000, 1, 1)
+    finally:
+        block.close()
+        block.unlink()
+    dist, params = DISTRIBUTIONS[dist_name]
+    rng = np.random.default_rng(request_seed(42, 0, list(DISTRIBUTIONS).index(dist_name)))
+    _, server_loads = run_simulation(make_balancer('Least Connection', 3, history='off'),
+                                     generate_requests(5000, dist, rng=rng, **params))
+    np.testing.assert_allclose(record['server_loads'], server_loads)
@@ -0,0 +1,25 @@
+import numpy as np
+from result_store import ResultStore
+from simulation import DISTRIBUTIONS, generate_requests, make_balancer, request_seed, run_simulation
+from sweep import run_sweep
+
+def test_subset_sweep_matches_full_sweep(tmp_path):
+    full = run_sweep(2, 2000, [3], ['Round Robin', 'Least Connection'], seed=7, workers=1,
+                     store=ResultStore(str(tmp_path / 'full')))
+    subset = run_sweep(2, 2000, [3], ['Round Robin', 'Least Connection'], distributions=['Uniform Distribution'],
+                       seed=7, workers=1, store=ResultStore(str(tmp_path / 'subset')))
+    full_cells = {(record['run'], record['distribution'], record['algorithm']): record for record in full}
+    assert len(subset) == 4
+    for record in subset:
+        expected = full_cells[(record['run'], record['distribution'], record['algorithm'])]
+        np.testing.assert_array_equal(record['server_loads'], expected['server_loads'])
+
+def test_sweep_uses_simulation_request_streams(tmp_path):
+    dist_name = 'Uniform Distribution'
+    [record] = run_sweep(1, 2000, [3], ['Round Robin'], distributions=[dist_name], seed=7, workers=1,
+                         store=ResultStore(str(tmp_path / 'store')))
+    dist, params = DISTRIBUTIONS[dist_name]
+    rng = np.random.default_rng(request_seed(7, 0, list(DISTRIBUTIONS).index(dist_name)))
+    _, server_loads = run_simulation(make_balancer('Round Robin', 3, history='off'),
+                                     generate_requests(2000, dist, rng=rng, **params))
+    np.testing.assert_array_equal(record['server_loads'], server_loads)
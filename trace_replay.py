@@ -0,0 +1,212 @@
+import numpy as np
+from simulation import ALGORITHMS, make_balancer, run_simulation
+from event_simulation import EventSimulation
+from typing import Dict, Iterator, List
+import argparse
+import calendar
+import json
+import os
+import re
+import sys
+
+# One request from HAProxy's `option httplog` format:
+#   ... [06/Feb/2009:12:14:14.655] http-in static/srv1 10/0/30/69/109 200 2750 ...
+HTTPLOG_PATTERN = re.compile(
+    r'\[(\d{2})/(\w{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2})\.(\d{3})\] \S+ (\S+) '
+    r'-?\d+/-?\d+/-?\d+/-?\d+/\+?(-?\d+) (\d{3}) \+?(\d+) '
+)
+
+MONTHS = {name: i for i, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+
+# Column name -> dtype of the raw little-endian file backing it
+COLUMNS = {
+    'timestamp': '<f8',  # Accept time, seconds since the epoch (log clock, no timezone)
+    'latency': '<f4',    # Total active time Ta in milliseconds
+    'bytes': '<u4',      # Bytes sent to the client
+    'status': '<u2',     # HTTP status code
+    'server': '<i2'      # Index into meta.json "servers" ("backend/server")
+}
+
+def convert_log(log_path: str, trace_dir: str, batch_lines: int = 1 << 16) -> Dict:
+    """Parse an HAProxy httplog file once into a columnar trace directory
+
+    Each column is appended batch by batch to `<trace_dir>/<column>.bin`, so
+    parsing runs in constant memory; rows are then sorted by accept time in
+    windows (see _sort_by_timestamp). Lines that do not parse and aborted
+    requests (negative Ta) are counted and skipped.
+    """
+    os.makedirs(trace_dir, exist_ok=True)
+    files = {name: open(os.path.join(trace_dir, f'{name}.bin'), 'wb') for name in COLUMNS}
+    servers = {}
+    second_cache = {}
+    meta = {'source': os.path.abspath(log_path), 'rows': 0, 'skipped': 0}
+    
+    def write_batch(batch: List[str]):
+        columns = {name: [] for name in COLUMNS}
+        for line in batch:
+            match = HTTPLOG_PATTERN.search(line)
+            if match is None or match.group(9).startswith('-'):
+                meta['skipped'] += 1
+                continue
+            day, month, year, hour, minute, second, millis, server, total, status, sent = match.groups()
+            # Most lines share their second with a neighbour; convert each second once
+            key = (year, month, day, hour, minute, second)
+            epoch = second_cache.get(key)
+            if epoch is None:
+                epoch = calendar.timegm((int(year), MONTHS[month], int(day), int(hour), int(minute), int(second)))
+                second_cache[key] = epoch
+            columns['timestamp'].append(epoch + int(millis) / 1000.0)
+            columns['latency'].append(float(total))
+            columns['bytes'].append(min(int(sent), 0xFFFFFFFF))
+            columns['status'].append(int(status))
+            columns['server'].append(servers.setdefault(server, len(servers)))
+        for name, dtype in COLUMNS.items():
+            np.asarray(columns[name], dtype=dtype).tofile(files[name])
+        meta['rows'] += len(columns['timestamp'])
+        if len(second_cache) > 100000:
+            second_cache.clear()
+    
+    try:
+        with open(log_path, 'r', errors='replace') as log:
+            batch = []
+            for line in log:
+                batch.append(line)
+                if len(batch) == batch_lines:
+                    write_batch(batch)
+                    batch = []
+            write_batch(batch)
+    finally:
+        for f in files.values():
+            f.close()
+    
+    _sort_by_timestamp(trace_dir, meta['rows'])
+    meta['columns'] = COLUMNS
+    meta['servers'] = [name for name, _ in sorted(servers.items(), key=lambda item: item[1])]
+    with open(os.path.join(trace_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=4)
+    return meta
+
+def _sort_by_timestamp(trace_dir: str, rows: int, window: int = 1 << 20):
+    """Reorder every column by accept time, a window of rows at a time
+
+    HAProxy writes a log line when a request ends, so accept times are only
+    locally out of order. Each window is sorted together with the rows held
+    back from earlier windows; rows no later window can precede are written
+    back in place and the rest are held back. Memory is one window plus the
+    held-back rows, however long the trace.
+    """
+    if rows == 0:
+        return
+    columns = {name: np.memmap(os.path.join(trace_dir, f'{name}.bin'), dtype=dtype, mode='r+', shape=(rows,))
+               for name, dtype in COLUMNS.items()}
+    timestamps = columns['timestamp']
+    starts = range(0, rows, window)
+    # Each window overlaps the previous one by a row, so disorder across a boundary is seen too
+    if not any(np.any(np.diff(timestamps[max(start - 1, 0):start + window]) < 0) for start in starts):
+        return
+    window_mins = np.array([timestamps[start:start + window].min() for start in starts])
+    # Earliest accept time in any later window; inf after the last one
+    later_min = np.append(np.minimum.accumulate(window_mins[::-1])[::-1][1:], np.inf)
+    
+    held = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    written = 0
+    for window_idx, start in enumerate(starts):
+        # Copies the window before anything is written over it; writes never pass its end
+        pending = {name: np.concatenate((held[name], column[start:start + window])) for name, column in columns.items()}
+        order = np.argsort(pending['timestamp'], kind='stable')
+        ready = int(np.searchsorted(pending['timestamp'][order], later_min[window_idx], side='right'))
+        for name, column in columns.items():
+            values = pending[name][order]
+            column[written:written + ready] = values[:ready]
+            held[name] = values[ready:]
+        written += ready
+    for column in columns.values():
+        column.flush()
+
+class Trace:
+    """Read-only memory-mapped view of a converted trace directory"""
+    
+    def __init__(self, trace_dir: str):
+        with open(os.path.join(trace_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.servers = self.meta['servers']
+        self.columns = {}
+        for name, dtype in self.meta['columns'].items():
+            if self.rows == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(os.path.join(trace_dir, f'{name}.bin'), dtype=dtype, mode='r', shape=(self.rows,))
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+    
+    def iter_chunks(self, column: str, chunk_size: int = 1 << 20) -> Iterator[np.ndarray]:
+        """Yield consecutive slices of one column; slices are memmap views, not copies"""
+        data = self.columns[column]
+        for start in range(0, self.rows, chunk_size):
+            yield data[start:start + chunk_size]
+    
+    def observed_server_loads(self, column: str = 'latency', chunk_size: int = 1 << 20) -> np.ndarray:
+        """Per-server totals of a column as HAProxy actually routed the traffic"""
+        loads = np.zeros(len(self.servers))
+        for start in range(0, self.rows, chunk_size):
+            servers = self.columns['server'][start:start + chunk_size]
+            loads += np.bincount(servers, weights=self.columns[column][start:start + chunk_size], minlength=len(self.servers))
+        return loads
+
+def replay(balancer, trace: Trace, column: str = 'latency', chunk_size: int = 1 << 20):
+    """Route the trace's requests through a balancer, chunk by chunk"""
+    return run_simulation(balancer, trace.iter_chunks(column, chunk_size))
+
+def replay_events(simulation: EventSimulation, trace: Trace, chunk_size: int = 1 << 20) -> Dict:
+    """Replay arrivals and latencies (as service times, in seconds) through the event engine"""
+    simulation.reset()
+    if trace.rows == 0:
+        return simulation.finish()
+    origin = float(trace['timestamp'][0])
+    for timestamps, latencies in zip(trace.iter_chunks('timestamp', chunk_size), trace.iter_chunks('latency', chunk_size)):
+        simulation.feed(timestamps - origin, latencies / 1000.0)
+    return simulation.finish()
+
+def jain_index(loads: np.ndarray) -> float:
+    """Jain's Fairness Index of a load vector"""
+    sum_squared = float(np.dot(loads, loads))
+    return float(loads.sum()) ** 2 / (len(loads) * sum_squared) if sum_squared > 0 else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert HAProxy logs to columnar traces and replay them through the balancers')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help='Parse an HAProxy httplog file into a trace directory')
+    convert_parser.add_argument('log')
+    convert_parser.add_argument('trace_dir')
+    replay_parser = subparsers.add_parser('replay', help='Replay a trace through every algorithm')
+    replay_parser.add_argument('trace_dir')
+    replay_parser.add_argument('--column', default='latency', choices=['latency', 'bytes'])
+    replay_parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    replay_parser.add_argument('--chunk-size', type=int, default=1 << 20)
+    args = parser.parse_args()
+    
+    if args.command == 'convert':
+        meta = convert_log(args.log, args.trace_dir)
+        print(f"✅ Converted {meta['rows']} requests ({meta['skipped']} skipped) across {len(meta['servers'])} servers into {args.trace_dir}")
+        return
+    
+    trace = Trace(args.trace_dir)
+    num_servers = len(trace.servers)
+    observed = trace.observed_server_loads(args.column)
+    print(f"📊 Replaying {len(trace)} requests over {num_servers} servers by {args.column}")
+    print(f"  HAProxy (observed): Jain's Fairness Index {jain_index(observed):.3f}")
+    for algorithm in args.algorithms:
+        balancer = make_balancer(algorithm, num_servers, history='off')
+        metrics, _ = replay(balancer, trace, args.column, args.chunk_size)
+        print(f"  {algorithm}: Jain's Fairness Index {metrics['balance_score']:.3f}, "
+              f"{metrics['execution_time']:.2f}s")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
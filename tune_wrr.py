@@ -0,0 +1,197 @@
+import numpy as np
+from load_balancer import WeightedRoundRobinLoadBalancer
+from simulation import DISTRIBUTIONS, DEFAULT_WRR_WEIGHTS, generate_requests, request_seed, run_simulation
+from scipy.optimize import differential_evolution
+from typing import Dict, List
+import argparse
+import os
+import re
+import sys
+import time
+
+OBJECTIVES = ('jain', 'max_mean')
+
+# HAProxy accepts server weights from 0 to 256
+HAPROXY_MAX_WEIGHT = 256
+
+SERVER_LINE = re.compile(r'^(\s*server\s+\S+\s+\S+.*?\bweight\s+)(\d+)(.*)$')
+
+def objective_values(utilization: np.ndarray, objective: str) -> np.ndarray:
+    """Per-row cost to minimize: 1 - Jain's index, or max/mean utilization"""
+    mean = utilization.mean(axis=-1)
+    if objective == 'jain':
+        squares = (utilization * utilization).mean(axis=-1)
+        return 1.0 - np.divide(mean * mean, squares, out=np.ones_like(mean), where=squares > 0)
+    return np.divide(utilization.max(axis=-1), mean, out=np.ones_like(mean), where=mean > 0)
+
+class WRRTuner:
+    """Scores WRR weight vectors against fixed workloads and searches for the best
+
+    A WRR balancer repeats one cycle of length L (the sum of the weights), so a
+    server's load is the sum of the per-position request sums S_L[p] over
+    the positions p it owns in the cycle. S_L is computed once per workload
+    and cycle length. Every candidate sharing that length is then scored
+    with a single bincount over (candidate, server) pairs, without running
+    the balancer request by request.
+    """
+    
+    def __init__(self, capacities: List[float], workloads: List[np.ndarray], schedule: str = 'smooth'):
+        self.capacities = np.asarray(capacities, dtype=np.float64)
+        self.num_servers = len(capacities)
+        self.workloads = workloads
+        self.schedule = schedule
+        self.cycles = {}
+        self.position_sums = {}
+        self.evaluated = 0
+    
+    def cycle(self, weights: tuple) -> np.ndarray:
+        """The balancer's own precomputed cycle for these weights, cached"""
+        if weights not in self.cycles:
+            balancer = WeightedRoundRobinLoadBalancer(self.num_servers, list(weights), schedule=self.schedule, history='off')
+            self.cycles[weights] = balancer.cycle
+        return self.cycles[weights]
+    
+    def _position_sums(self, workload_idx: int, length: int) -> np.ndarray:
+        key = (workload_idx, length)
+        if key not in self.position_sums:
+            requests = self.workloads[workload_idx]
+            self.position_sums[key] = np.bincount(np.arange(len(requests)) % length, weights=requests, minlength=length)
+        return self.position_sums[key]
+    
+    def server_loads(self, weight_matrix: np.ndarray) -> np.ndarray:
+        """Final per-server loads, shape (workloads, candidates, servers)"""
+        weight_matrix = np.asarray(weight_matrix, dtype=np.int64)
+        num_candidates = len(weight_matrix)
+        loads = np.empty((len(self.workloads), num_candidates, self.num_servers))
+        groups = {}
+        for candidate, weights in enumerate(map(tuple, weight_matrix.tolist())):
+            groups.setdefault(len(self.cycle(weights)), []).append(candidate)
+        
+        for length, candidates in groups.items():
+            cycles = np.stack([self.cycle(tuple(weight_matrix[c].tolist())) for c in candidates])
+            # Row-major (candidate, server) bins for one bincount over the group
+            bins = (np.arange(len(candidates))[:, None] * self.num_servers + cycles).ravel()
+            for workload_idx in range(len(self.workloads)):
+                sums = np.tile(self._position_sums(workload_idx, length), len(candidates))
+                grouped = np.bincount(bins, weights=sums, minlength=len(candidates) * self.num_servers)
+                loads[workload_idx, candidates] = grouped.reshape(len(candidates), self.num_servers)
+        self.evaluated += num_candidates
+        return loads
+    
+    def score(self, weight_matrix: np.ndarray, objective: str = 'jain') -> np.ndarray:
+        """Mean objective over all workloads, one value per candidate (lower is better)"""
+        utilization = self.server_loads(weight_matrix) / self.capacities
+        return objective_values(utilization, objective).mean(axis=0)
+    
+    def tune(self, objective: str = 'jain', max_weight: int = 32, seed: int = 0, maxiter: int = 200, popsize: int = 20) -> Dict:
+        """Search integer weights in [1, max_weight] with differential evolution
+
+        The whole population is scored in one vectorized call per
+        generation; polishing is off because the weights are integers.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective: {objective}")
+        
+        def cost(population: np.ndarray) -> np.ndarray:
+            # vectorized=True passes candidates as columns
+            return self.score(np.rint(population.T).astype(np.int64), objective)
+        
+        result = differential_evolution(
+            cost, [(1, max_weight)] * self.num_servers, integrality=[True] * self.num_servers,
+            vectorized=True, updating='deferred', polish=False, seed=seed, maxiter=maxiter, popsize=popsize, tol=1e-8
+        )
+        weights = np.rint(result.x).astype(np.int64)
+        # Weights only matter up to a common factor; report the smallest equivalent vector
+        weights //= np.gcd.reduce(weights)
+        return {'weights': weights.tolist(), 'cost': float(self.score(weights[None, :], objective)[0]),
+                'generations': int(result.nit), 'evaluated': self.evaluated}
+
+def make_workloads(distributions: List[str], num_runs: int, num_requests: int, seed: int) -> List[np.ndarray]:
+    """The same per-(run, distribution) request streams simulation.py uses"""
+    workloads = []
+    for run in range(num_runs):
+        for dist_idx, dist_name in enumerate(DISTRIBUTIONS):
+            if dist_name not in distributions:
+                continue
+            dist, params = DISTRIBUTIONS[dist_name]
+            rng = np.random.default_rng(request_seed(seed, run, dist_idx))
+            workloads.append(generate_requests(num_requests, dist, rng=rng, **params))
+    return workloads
+
+def simulated_cost(weights: List[int], capacities: List[float], workloads: List[np.ndarray], objective: str, schedule: str) -> float:
+    """Cross-check: the objective from running the real balancer over every workload"""
+    costs = []
+    for requests in workloads:
+        balancer = WeightedRoundRobinLoadBalancer(len(weights), weights, schedule=schedule, history='off')
+        _, server_loads = run_simulation(balancer, requests)
+        costs.append(objective_values(server_loads / np.asarray(capacities), objective))
+    return float(np.mean(costs))
+
+def render_haproxy_config(template: str, weights: List[int], note: str = '') -> str:
+    """Replace the `weight N` of each server line, in order, with the tuned weights"""
+    lines = template.splitlines()
+    server_lines = [i for i, line in enumerate(lines) if SERVER_LINE.match(line)]
+    if len(server_lines) != len(weights):
+        raise ValueError(f"Template has {len(server_lines)} weighted server lines but {len(weights)} weights were tuned")
+    for i, weight in zip(server_lines, weights):
+        lines[i] = SERVER_LINE.sub(lambda match: f'{match.group(1)}{weight}{match.group(3)}', lines[i])
+    header = [f'# {line}' for line in note.splitlines()]
+    return '\n'.join(header + lines) + '\n'
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune Weighted Round Robin weights for backend capacities and write an HAProxy config')
+    parser.add_argument('--capacities', type=float, nargs='+', required=True,
+                        help='Relative capacity of each backend, in the order of the template server lines')
+    parser.add_argument('--objective', default='jain', choices=OBJECTIVES,
+                        help="jain: maximize Jain's index of utilization; max_mean: minimize max/mean utilization")
+    parser.add_argument('--distributions', nargs='+', default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument('--runs', type=int, default=3, help='Workloads per distribution')
+    parser.add_argument('--requests', type=int, default=12000)
+    parser.add_argument('--schedule', default='smooth', choices=WeightedRoundRobinLoadBalancer.SCHEDULES,
+                        help="WRR schedule to tune for (HAProxy's roundrobin interleaves, like 'smooth')")
+    parser.add_argument('--max-weight', type=int, default=32)
+    parser.add_argument('--maxiter', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--template', default='configs/haproxy_wrr.cfg')
+    parser.add_argument('--output', default='configs/haproxy_wrr_tuned.cfg')
+    args = parser.parse_args()
+    if not 1 <= args.max_weight <= HAPROXY_MAX_WEIGHT:
+        parser.error(f"--max-weight must be between 1 and {HAPROXY_MAX_WEIGHT}")
+    with open(args.template) as f:
+        template = f.read()
+    num_servers = sum(1 for line in template.splitlines() if SERVER_LINE.match(line))
+    if num_servers != len(args.capacities):
+        parser.error(f"{args.template} has {num_servers} weighted server lines; pass one capacity per server")
+    
+    workloads = make_workloads(args.distributions, args.runs, args.requests, args.seed)
+    tuner = WRRTuner(args.capacities, workloads, args.schedule)
+    print(f"🔧 Tuning {len(args.capacities)} weights against {len(workloads)} workloads ({args.objective})")
+    sys.stdout.flush()
+    
+    start_time = time.time()
+    result = tuner.tune(args.objective, args.max_weight, seed=args.seed, maxiter=args.maxiter)
+    elapsed = time.time() - start_time
+    weights = result['weights']
+    
+    baselines = {
+        'hand-picked': np.resize(DEFAULT_WRR_WEIGHTS, len(args.capacities)).tolist(),
+        'equal': [1] * len(args.capacities),
+        'tuned': weights
+    }
+    print(f"\n{'weights':<12} {'vector':<24} {args.objective + ' cost':>14} {'simulated':>11}")
+    print("-" * 64)
+    for label, candidate in baselines.items():
+        cost = tuner.score(np.array([candidate]), args.objective)[0]
+        simulated = simulated_cost(candidate, args.capacities, workloads, args.objective, args.schedule)
+        print(f"{label:<12} {str(candidate):<24} {cost:>14.6f} {simulated:>11.6f}")
+    print(f"\n⏱️  {result['evaluated']} candidates scored over {result['generations']} generations in {elapsed:.2f}s")
+    
+    note = (f"Generated by tune_wrr.py: capacities {args.capacities}, objective {args.objective}, "
+            f"schedule {args.schedule}\nweights {weights}, cost {result['cost']:.6f}")
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        f.write(render_haproxy_config(template, weights, note))
+    print(f"✅ HAProxy config written to {args.output}; deploy with: cd scripts && ./deploy_configs.sh {os.path.basename(args.output)}")
+
+if __name__ == "__main__":
+    main()